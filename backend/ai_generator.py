@@ -49,9 +49,20 @@ Provide only the direct answer to what was asked.
         self.client = anthropic.Anthropic(api_key=api_key)
         self.model = model
 
+        # Async client is created on first use so sync-only callers never build it
+        self._api_key = api_key
+        self._async_client: Optional[anthropic.AsyncAnthropic] = None
+
         # Pre-build base API parameters
         self.base_params = {"model": self.model, "temperature": 0, "max_tokens": 800}
 
+    @property
+    def async_client(self) -> anthropic.AsyncAnthropic:
+        """Async Anthropic client for concurrent requests"""
+        if self._async_client is None:
+            self._async_client = anthropic.AsyncAnthropic(api_key=self._api_key)
+        return self._async_client
+
     def generate_response(
         self,
         query: str,
@@ -71,7 +82,50 @@ Provide only the direct answer to what was asked.
         Returns:
             Generated response as string
         """
+        api_params = self._build_params(query, conversation_history, tools)
+
+        # Get response from Claude
+        response = self.client.messages.create(**api_params)
+
+        # Handle tool execution if needed
+        if response.stop_reason == "tool_use" and tool_manager:
+            return self._handle_tool_execution(response, api_params, tool_manager)
+
+        # Return direct response
+        return response.content[0].text
+
+    async def generate_response_async(
+        self,
+        query: str,
+        conversation_history: Optional[str] = None,
+        tools: Optional[List] = None,
+        tool_manager=None,
+    ) -> str:
+        """
+        Async version of generate_response, so several queries can wait on
+        the API concurrently. Takes the same arguments.
+
+        Returns:
+            Generated response as string
+        """
+        api_params = self._build_params(query, conversation_history, tools)
+
+        response = await self.async_client.messages.create(**api_params)
 
+        if response.stop_reason == "tool_use" and tool_manager:
+            final_params = self._build_final_params(response, api_params, tool_manager)
+            final_response = await self.async_client.messages.create(**final_params)
+            return final_response.content[0].text
+
+        return response.content[0].text
+
+    def _build_params(
+        self,
+        query: str,
+        conversation_history: Optional[str],
+        tools: Optional[List],
+    ) -> Dict[str, Any]:
+        """Build the API parameters for the initial request"""
         # Build system content efficiently - avoid string ops when possible
         system_content = (
             f"{self.SYSTEM_PROMPT}\n\nPrevious conversation:\n{conversation_history}"
@@ -91,15 +145,7 @@ Provide only the direct answer to what was asked.
             api_params["tools"] = tools
             api_params["tool_choice"] = {"type": "auto"}
 
-        # Get response from Claude
-        response = self.client.messages.create(**api_params)
-
-        # Handle tool execution if needed
-        if response.stop_reason == "tool_use" and tool_manager:
-            return self._handle_tool_execution(response, api_params, tool_manager)
-
-        # Return direct response
-        return response.content[0].text
+        return api_params
 
     def _handle_tool_execution(
         self, initial_response, base_params: Dict[str, Any], tool_manager
@@ -115,6 +161,18 @@ Provide only the direct answer to what was asked.
         Returns:
             Final response text after tool execution
         """
+        final_params = self._build_final_params(
+            initial_response, base_params, tool_manager
+        )
+
+        # Get final response
+        final_response = self.client.messages.create(**final_params)
+        return final_response.content[0].text
+
+    def _build_final_params(
+        self, initial_response, base_params: Dict[str, Any], tool_manager
+    ) -> Dict[str, Any]:
+        """Execute requested tools and build the follow-up request parameters"""
         # Start with existing messages
         messages = base_params["messages"].copy()
 
@@ -142,12 +200,8 @@ Provide only the direct answer to what was asked.
             messages.append({"role": "user", "content": tool_results})
 
         # Prepare final API call without tools
-        final_params = {
+        return {
             **self.base_params,
             "messages": messages,
             "system": base_params["system"],
         }
-
-        # Get final response
-        final_response = self.client.messages.create(**final_params)
-        return final_response.content[0].text
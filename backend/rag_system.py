@@ -1,5 +1,8 @@
+import multiprocessing
 import os
-from typing import Dict, List, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 from ai_generator import AIGenerator
 from document_processor import DocumentProcessor
@@ -8,6 +11,9 @@ from search_tools import CourseOutlineTool, CourseSearchTool, ToolManager
 from session_manager import SessionManager
 from vector_store import VectorStore
 
+# Below this many files, spawning parser processes costs more than it saves
+PARALLEL_PARSE_MIN_FILES = 32
+
 
 class RAGSystem:
     """Main orchestrator for the Retrieval-Augmented Generation system"""
@@ -61,8 +67,61 @@ class RAGSystem:
             print(f"Error processing course document {file_path}: {e}")
             return None, 0
 
+    def _parse_course_documents(
+        self, file_paths: List[str], parallel: bool
+    ) -> List[Union[Tuple[Course, List[CourseChunk]], Exception]]:
+        """
+        Parse course documents, in file order.
+
+        Args:
+            file_paths: Paths of the course documents to parse
+            parallel: Whether to parse in a pool of worker processes
+
+        Returns:
+            One (Course, chunks) tuple per file, or the exception raised
+            while parsing that file
+        """
+        outcomes: List[Union[Tuple[Course, List[CourseChunk]], Exception]] = []
+        if parallel:
+            try:
+                with ProcessPoolExecutor(
+                    max_workers=min(len(file_paths), os.cpu_count() or 1),
+                    mp_context=multiprocessing.get_context("spawn"),
+                ) as executor:
+                    futures = [
+                        executor.submit(
+                            self.document_processor.process_course_document,
+                            file_path,
+                        )
+                        for file_path in file_paths
+                    ]
+                    for future in futures:
+                        try:
+                            outcomes.append(future.result())
+                        except BrokenProcessPool:
+                            raise
+                        except Exception as e:
+                            outcomes.append(e)
+                return outcomes
+            except BrokenProcessPool as e:
+                # Spawned workers can't always re-import __main__ (e.g. a REPL)
+                print(f"Parallel parsing failed ({e}); parsing serially instead")
+                outcomes.clear()
+
+        for file_path in file_paths:
+            try:
+                outcomes.append(
+                    self.document_processor.process_course_document(file_path)
+                )
+            except Exception as e:
+                outcomes.append(e)
+        return outcomes
+
     def add_course_folder(
-        self, folder_path: str, clear_existing: bool = False
+        self,
+        folder_path: str,
+        clear_existing: bool = False,
+        parallel: Optional[bool] = None,
     ) -> Tuple[int, int]:
         """
         Add all course documents from a folder.
@@ -70,6 +129,9 @@ class RAGSystem:
         Args:
             folder_path: Path to folder containing course documents
             clear_existing: Whether to clear existing data first
+            parallel: Whether to parse documents in worker processes; by
+                default only folders of PARALLEL_PARSE_MIN_FILES or more files
+                are parsed in worker processes
 
         Returns:
             Tuple of (total courses added, total chunks created)
@@ -89,49 +151,60 @@ class RAGSystem:
         # Get existing course titles to avoid re-processing
         existing_course_titles = set(self.vector_store.get_existing_course_titles())
 
-        # Process each file in the folder
-        for file_name in os.listdir(folder_path):
-            file_path = os.path.join(folder_path, file_name)
-            if os.path.isfile(file_path) and file_name.lower().endswith(
-                (".pdf", ".docx", ".txt")
-            ):
-                try:
-                    # Check if this course might already exist
-                    # We'll process the document to get the course ID, but only add if new
-                    course, course_chunks = (
-                        self.document_processor.process_course_document(file_path)
-                    )
+        # Collect the course documents in the folder
+        with os.scandir(folder_path) as entries:
+            file_paths = [
+                entry.path
+                for entry in entries
+                if entry.is_file()
+                and entry.name.lower().endswith((".pdf", ".docx", ".txt"))
+            ]
+        if not file_paths:
+            return 0, 0
 
-                    if course and course.title not in existing_course_titles:
-                        # This is a new course - add it to the vector store
-                        self.vector_store.add_course_metadata(course)
-                        self.vector_store.add_course_content(course_chunks)
-                        total_courses += 1
-                        total_chunks += len(course_chunks)
-                        print(
-                            f"Added new course: {course.title} ({len(course_chunks)} chunks)"
-                        )
-                        existing_course_titles.add(course.title)
-                    elif course:
-                        print(f"Course already exists: {course.title} - skipping")
-                except Exception as e:
-                    print(f"Error processing {file_name}: {e}")
+        if parallel is None:
+            parallel = len(file_paths) >= PARALLEL_PARSE_MIN_FILES
+        outcomes = self._parse_course_documents(file_paths, parallel)
 
-        return total_courses, total_chunks
+        # Write to the vector store serially, in folder order
+        for file_path, outcome in zip(file_paths, outcomes, strict=True):
+            file_name = os.path.basename(file_path)
+            try:
+                if isinstance(outcome, Exception):
+                    raise outcome
 
-    def query(
-        self, query: str, session_id: Optional[str] = None
-    ) -> Tuple[str, List[str]]:
-        """
-        Process a user query using the RAG system with tool-based search.
+                # Check if this course might already exist
+                # We'll process the document to get the course ID, but only add if new
+                course, course_chunks = outcome
 
-        Args:
-            query: User's question
-            session_id: Optional session ID for conversation context
+                if course and course.title not in existing_course_titles:
+                    # This is a new course - add it to the vector store
+                    self.vector_store.add_course_metadata(course)
+                    self.vector_store.add_course_content(course_chunks)
+                    total_courses += 1
+                    total_chunks += len(course_chunks)
+                    print(
+                        f"Added new course: {course.title} ({len(course_chunks)} chunks)"
+                    )
+                    existing_course_titles.add(course.title)
+                elif course:
+                    print(f"Course already exists: {course.title} - skipping")
+            except Exception as e:
+                print(f"Error processing {file_name}: {e}")
 
-        Returns:
-            Tuple of (response, sources list - empty for tool-based approach)
-        """
+        return total_courses, total_chunks
+
+    def _create_tool_manager(self) -> ToolManager:
+        """Build a tool manager with its own search and outline tools"""
+        tool_manager = ToolManager()
+        tool_manager.register_tool(CourseSearchTool(self.vector_store))
+        tool_manager.register_tool(CourseOutlineTool(self.vector_store))
+        return tool_manager
+
+    def _generation_args(
+        self, query: str, session_id: Optional[str], tool_manager: ToolManager
+    ) -> Dict[str, Any]:
+        """Build the AI generator arguments shared by query and aquery"""
         # Create prompt for the AI with clear instructions
         prompt = f"""Answer this question about course materials: {query}"""
 
@@ -140,19 +213,26 @@ class RAGSystem:
         if session_id:
             history = self.session_manager.get_conversation_history(session_id)
 
-        # Generate response using AI with tools
-        response = self.ai_generator.generate_response(
-            query=prompt,
-            conversation_history=history,
-            tools=self.tool_manager.get_tool_definitions(),
-            tool_manager=self.tool_manager,
-        )
+        return {
+            "query": prompt,
+            "conversation_history": history,
+            "tools": tool_manager.get_tool_definitions(),
+            "tool_manager": tool_manager,
+        }
 
+    def _finish_query(
+        self,
+        query: str,
+        session_id: Optional[str],
+        response: str,
+        tool_manager: ToolManager,
+    ) -> Tuple[str, List[str]]:
+        """Collect the query's sources and record the exchange in the session"""
         # Get sources from the search tool
-        sources = self.tool_manager.get_last_sources()
+        sources = tool_manager.get_last_sources()
 
         # Reset sources after retrieving them
-        self.tool_manager.reset_sources()
+        tool_manager.reset_sources()
 
         # Update conversation history
         if session_id:
@@ -161,6 +241,47 @@ class RAGSystem:
         # Return response with sources from tool searches
         return response, sources
 
+    def query(
+        self, query: str, session_id: Optional[str] = None
+    ) -> Tuple[str, List[str]]:
+        """
+        Process a user query using the RAG system with tool-based search.
+
+        Args:
+            query: User's question
+            session_id: Optional session ID for conversation context
+
+        Returns:
+            Tuple of (response, sources list - empty for tool-based approach)
+        """
+        # Generate response using AI with tools
+        response = self.ai_generator.generate_response(
+            **self._generation_args(query, session_id, self.tool_manager)
+        )
+        return self._finish_query(query, session_id, response, self.tool_manager)
+
+    async def aquery(
+        self, query: str, session_id: Optional[str] = None
+    ) -> Tuple[str, List[str]]:
+        """
+        Async version of query for running several queries concurrently.
+
+        Each call registers its own search tools so that sources from
+        interleaved queries don't overwrite one another.
+
+        Args:
+            query: User's question
+            session_id: Optional session ID for conversation context
+
+        Returns:
+            Tuple of (response, sources list - empty for tool-based approach)
+        """
+        tool_manager = self._create_tool_manager()
+        response = await self.ai_generator.generate_response_async(
+            **self._generation_args(query, session_id, tool_manager)
+        )
+        return self._finish_query(query, session_id, response, tool_manager)
+
     def get_course_analytics(self) -> Dict:
         """Get analytics about the course catalog"""
         return {
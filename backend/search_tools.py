@@ -212,6 +212,10 @@ class ToolManager:
         """Get all tool definitions for Anthropic tool calling"""
         return [tool.get_tool_definition() for tool in self.tools.values()]
 
+    def get_tool_definitions_by_name(self) -> Dict[str, Dict[str, Any]]:
+        """Get all tool definitions keyed by tool name"""
+        return {name: tool.get_tool_definition() for name, tool in self.tools.items()}
+
     def execute_tool(self, tool_name: str, **kwargs) -> str:
         """Execute a tool by name with given parameters"""
         if tool_name not in self.tools:
@@ -1,18 +1,91 @@
-import os
-import sys
+from dataclasses import dataclass
+from types import MappingProxyType, SimpleNamespace
 from typing import Any, Dict, List
-from unittest.mock import MagicMock, Mock
+from unittest.mock import MagicMock, patch
 
 import pytest
-
-# Add backend directory to path
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
-
+from ai_generator import AIGenerator
 from models import Course, CourseChunk, Lesson
 from vector_store import SearchResults
 
 
-@pytest.fixture
+def pytest_addoption(parser):
+    parser.addoption(
+        "--run-integration",
+        action="store_true",
+        default=False,
+        help="run tests marked integration (real ChromaDB, embeddings, API)",
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    for item in items:
+        # Under --dist=loadgroup, xdist sends each group to a single worker
+        if "serial" in item.keywords:
+            item.add_marker(pytest.mark.xdist_group("serial"))
+        # Everything not marked integration is a unit test, for -m unit
+        if "integration" not in item.keywords:
+            item.add_marker(pytest.mark.unit)
+
+    if config.getoption("--run-integration"):
+        return
+    skip_integration = pytest.mark.skip(reason="needs --run-integration")
+    for item in items:
+        if "integration" in item.keywords:
+            item.add_marker(skip_integration)
+
+
+# Default search payload for mock_vector_store, copied into each SearchResults
+_SEARCH_DOCS = (
+    "Welcome to Building Toward Computer Use with Anthropic. Built in partnership with Anthropic.",
+    "In this lesson, you'll learn about the API basics.",
+)
+_SEARCH_METADATA = (
+    MappingProxyType(
+        {
+            "course_title": "Building Towards Computer Use with Anthropic",
+            "lesson_number": 0,
+        }
+    ),
+    MappingProxyType(
+        {
+            "course_title": "Building Towards Computer Use with Anthropic",
+            "lesson_number": 1,
+        }
+    ),
+)
+_SEARCH_DISTANCES = (0.1, 0.2)
+
+
+@dataclass(frozen=True, slots=True)
+class _MockConfig:
+    """Immutable stand-in for Config shared across the test session"""
+
+    ANTHROPIC_API_KEY: str = "test-api-key"
+    ANTHROPIC_MODEL: str = "claude-3-sonnet-20240229"
+    EMBEDDING_MODEL: str = "all-MiniLM-L6-v2"
+    CHUNK_SIZE: int = 800
+    CHUNK_OVERLAP: int = 100
+    MAX_RESULTS: int = 5
+    MAX_HISTORY: int = 2
+    CHROMA_PATH: str = "./test_chroma_db"
+
+
+def make_response(
+    text="This is a test response about the course content.",
+    tool_blocks=(),
+    stop_reason="end_turn",
+):
+    """Build a mock Anthropic message restricted to content and stop_reason"""
+    response = MagicMock(spec_set=["content", "stop_reason"])
+    response.content = (
+        list(tool_blocks) if tool_blocks else [SimpleNamespace(type="text", text=text)]
+    )
+    response.stop_reason = stop_reason
+    return response
+
+
+@pytest.fixture(scope="session")
 def sample_course():
     """Create a sample course for testing"""
     return Course(
@@ -35,7 +108,7 @@ def sample_course():
     )
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_course_chunks():
     """Create sample course chunks for testing"""
     return [
@@ -60,101 +133,159 @@ def sample_course_chunks():
     ]
 
 
-@pytest.fixture
-def mock_vector_store():
-    """Create a mock vector store for testing"""
-    mock_store = MagicMock()
-
-    # Default search results
-    mock_store.search.return_value = SearchResults(
-        documents=[
-            "Welcome to Building Toward Computer Use with Anthropic. Built in partnership with Anthropic.",
-            "In this lesson, you'll learn about the API basics.",
-        ],
-        metadata=[
-            {
-                "course_title": "Building Towards Computer Use with Anthropic",
-                "lesson_number": 0,
-            },
-            {
-                "course_title": "Building Towards Computer Use with Anthropic",
-                "lesson_number": 1,
-            },
-        ],
-        distances=[0.1, 0.2],
-        error=None,
-    )
+class FakeVectorStore:
+    """Plain VectorStore double covering the calls the search tools make"""
 
-    # Course info response
-    mock_store.get_course_info.return_value = {
-        "title": "Building Towards Computer Use with Anthropic",
-        "link": "https://www.deeplearning.ai/short-courses/building-toward-computer-use-with-anthropic/",
-        "instructor": "Colt Steele",
-        "lessons": [
-            {
-                "number": 0,
-                "title": "Introduction",
-                "link": "https://example.com/lesson0",
-            },
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """Restore the default responses and forget recorded calls"""
+        # Default search results
+        self.search_results = SearchResults(
+            documents=list(_SEARCH_DOCS),
+            metadata=[dict(meta) for meta in _SEARCH_METADATA],
+            distances=list(_SEARCH_DISTANCES),
+            error=None,
+        )
+
+        # Course info response
+        self.course_info = {
+            "title": "Building Towards Computer Use with Anthropic",
+            "link": "https://www.deeplearning.ai/short-courses/building-toward-computer-use-with-anthropic/",
+            "instructor": "Colt Steele",
+            "lessons": [
+                {
+                    "number": 0,
+                    "title": "Introduction",
+                    "link": "https://example.com/lesson0",
+                },
+                {
+                    "number": 1,
+                    "title": "Getting Started",
+                    "link": "https://example.com/lesson1",
+                },
+            ],
+        }
+
+        # Lesson links by lesson number
+        self.lesson_links = {
+            0: "https://example.com/lesson0",
+            1: "https://example.com/lesson1",
+        }
+
+        self.search_calls = []
+        self.course_info_calls = []
+        self.lesson_link_calls = []
+
+    def search(self, query, course_name=None, lesson_number=None, limit=None):
+        self.search_calls.append(
             {
-                "number": 1,
-                "title": "Getting Started",
-                "link": "https://example.com/lesson1",
-            },
-        ],
-    }
+                "query": query,
+                "course_name": course_name,
+                "lesson_number": lesson_number,
+            }
+        )
+        return self.search_results
+
+    def get_course_info(self, course_name):
+        self.course_info_calls.append(course_name)
+        return self.course_info
 
-    # Lesson link response
-    mock_store.get_lesson_link.return_value = "https://example.com/lesson0"
+    def get_lesson_link(self, course_title, lesson_number):
+        self.lesson_link_calls.append((course_title, lesson_number))
+        return self.lesson_links.get(lesson_number)
 
-    return mock_store
+
+@pytest.fixture(scope="session")
+def _mock_vector_store_base():
+    """Build the fake vector store once per session"""
+    return FakeVectorStore()
 
 
 @pytest.fixture
-def mock_anthropic_client():
-    """Create a mock Anthropic client for testing"""
-    mock_client = MagicMock()
+def mock_vector_store(_mock_vector_store_base):
+    """Create a fake vector store for testing"""
+    # Drop calls and any overrides left behind by the previous test
+    _mock_vector_store_base.reset()
+    return _mock_vector_store_base
 
-    # Mock message response
-    mock_response = MagicMock()
-    mock_response.content = [
-        MagicMock(text="This is a test response about the course content.")
-    ]
-    mock_response.stop_reason = "end_turn"
 
-    mock_client.messages.create.return_value = mock_response
+@pytest.fixture(scope="module")
+def _patch_anthropic():
+    """Patch the Anthropic client class once per test module"""
+    with patch("ai_generator.anthropic.Anthropic") as mock_anthropic:
+        yield mock_anthropic
 
-    return mock_client
+
+@pytest.fixture
+def ai_generator(_patch_anthropic):
+    """Create an AIGenerator backed by the patched Anthropic client"""
+    mock_client = MagicMock(spec_set=["messages"])
+    mock_client.messages = MagicMock(spec_set=["create"])
+    _patch_anthropic.return_value = mock_client
+
+    generator = AIGenerator("test-key", "claude-3-sonnet")
+    yield generator
+    _patch_anthropic.reset_mock(return_value=True, side_effect=True)
 
 
 @pytest.fixture
-def mock_config():
-    """Create a mock configuration for testing"""
-    from dataclasses import dataclass
+def make_anthropic_response():
+    """Factory for mock Anthropic message responses"""
+    return make_response
+
+
+@pytest.fixture
+def make_tool_flow():
+    """Factory for the (tool_use, final) response pair of a tool round trip"""
+
+    def _make(tool_blocks, final_text):
+        return (
+            make_response(tool_blocks=tool_blocks, stop_reason="tool_use"),
+            make_response(final_text),
+        )
 
-    @dataclass
-    class MockConfig:
-        ANTHROPIC_API_KEY: str = "test-api-key"
-        ANTHROPIC_MODEL: str = "claude-3-sonnet-20240229"
-        EMBEDDING_MODEL: str = "all-MiniLM-L6-v2"
-        CHUNK_SIZE: int = 800
-        CHUNK_OVERLAP: int = 100
-        MAX_RESULTS: int = 5
-        MAX_HISTORY: int = 2
-        CHROMA_PATH: str = "./test_chroma_db"
+    return _make
 
-    return MockConfig()
+
+@pytest.fixture
+def mock_anthropic_client(ai_generator, make_anthropic_response):
+    """Create a mock Anthropic client for testing"""
+    mock_client = ai_generator.client
+    mock_client.messages.create.return_value = make_anthropic_response()
+
+    return mock_client
 
 
 @pytest.fixture
+def tool_manager_factory():
+    """Factory for mock tool managers with preset execute_tool results"""
+
+    def _make(returns=None, side_effect=None):
+        tool_manager = MagicMock(spec_set=["execute_tool"])
+        if side_effect:
+            tool_manager.execute_tool.side_effect = side_effect
+        else:
+            tool_manager.execute_tool.return_value = returns
+        return tool_manager
+
+    return _make
+
+
+@pytest.fixture(scope="session")
+def mock_config():
+    """Create a mock configuration for testing"""
+    return _MockConfig()
+
+
+@pytest.fixture(scope="session")
 def search_results_empty():
     """Create empty search results"""
     return SearchResults(documents=[], metadata=[], distances=[], error=None)
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def search_results_with_error():
     """Create search results with error"""
-    return SearchResults(
-        documents=[], metadata=[], distances=[], error="Search error: Connection failed"
-    )
+    return SearchResults.empty("Search error: Connection failed")
@@ -1,86 +1,138 @@
+import copy
 import os
-import sys
-from unittest.mock import MagicMock, mock_open, patch
+from concurrent.futures.process import BrokenProcessPool
+from types import SimpleNamespace
+from unittest.mock import Mock, mock_open, patch
 
 import pytest
-
-# Add backend directory to path
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
-
+from ai_generator import AIGenerator
+from document_processor import DocumentProcessor
 from models import Course, CourseChunk, Lesson
 from rag_system import RAGSystem
-from vector_store import SearchResults
+from session_manager import SessionManager
+from vector_store import SearchResults, VectorStore
+
+# Canned payloads shared by the tests below; none of the code under test
+# mutates them, so one instance per module is enough
+_PROMPT_CACHING_RESULTS = SearchResults(
+    documents=["Prompt caching retains processing results between invocations."],
+    metadata=[{"course_title": "Building Towards Computer Use", "lesson_number": 5}],
+    distances=[0.1],
+    error=None,
+)
+_COMPUTER_USE_RESULTS = SearchResults(
+    documents=["Content about computer use."],
+    metadata=[{"course_title": "Test Course", "lesson_number": 1}],
+    distances=[0.1],
+    error=None,
+)
+_SOURCE_RESULTS = SearchResults(
+    documents=["Doc 1"],
+    metadata=[{"course_title": "Course 1", "lesson_number": 1}],
+    distances=[0.1],
+    error=None,
+)
+_ERROR_RESULTS = SearchResults.empty("Database connection failed")
+
+_COURSE = Course(
+    title="Test Course",
+    course_link="https://example.com",
+    instructor="Test Instructor",
+    lessons=[Lesson(lesson_number=0, title="Intro")],
+)
+_CHUNKS = [
+    CourseChunk(
+        content="Test content",
+        course_title="Test Course",
+        lesson_number=0,
+        chunk_index=0,
+    )
+]
+
+# Parsed (course, chunks) per file name for the folder ingest test
+_FOLDER_DOCUMENTS = {
+    "course1.txt": (
+        Course(title="Course 1", lessons=[]),
+        [CourseChunk(content="C1", course_title="Course 1", chunk_index=0)],
+    ),
+    "course2.txt": (
+        Course(title="Course 2", lessons=[]),
+        [CourseChunk(content="C2", course_title="Course 2", chunk_index=0)],
+    ),
+}
+
+
+def _mock_class(cls):
+    """Mock a component class whose instances only expose cls's attributes"""
+    return Mock(spec=cls, return_value=Mock(spec=cls))
+
+
+@pytest.fixture(scope="module")
+def rag_template(mock_config):
+    """Build one RAGSystem against mocked component classes for the module"""
+    mocks = SimpleNamespace(
+        vector=_mock_class(VectorStore),
+        ai=_mock_class(AIGenerator),
+        processor=_mock_class(DocumentProcessor),
+        session=_mock_class(SessionManager),
+    )
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr("rag_system.VectorStore", mocks.vector)
+        mp.setattr("rag_system.AIGenerator", mocks.ai)
+        mp.setattr("rag_system.DocumentProcessor", mocks.processor)
+        mp.setattr("rag_system.SessionManager", mocks.session)
+        yield RAGSystem(mock_config), mocks
+
+
+@pytest.fixture
+def patched_rag(rag_template):
+    """Component mocks with per-test configuration cleared"""
+    _, mocks = rag_template
+    for mock_class in vars(mocks).values():
+        mock_class.return_value.reset_mock(return_value=True, side_effect=True)
+    return mocks
+
+
+@pytest.fixture
+def rag(rag_template, patched_rag):
+    """Shallow copy of the shared RAGSystem with no tracked sources"""
+    template, _ = rag_template
+    template.tool_manager.reset_sources()
+    return copy.copy(template)
 
 
 class TestRAGSystemIntegration:
     """Integration tests for RAG system"""
 
-    @patch("rag_system.VectorStore")
-    @patch("rag_system.AIGenerator")
-    @patch("rag_system.DocumentProcessor")
-    @patch("rag_system.SessionManager")
-    def test_initialization(
-        self, mock_session, mock_processor, mock_ai, mock_vector, mock_config
-    ):
+    def test_initialization(self, patched_rag, rag, mock_config):
         """Test RAG system initialization"""
-        rag = RAGSystem(mock_config)
-
         # Verify components were initialized
-        mock_processor.assert_called_once_with(
+        patched_rag.processor.assert_called_once_with(
             mock_config.CHUNK_SIZE, mock_config.CHUNK_OVERLAP
         )
-        mock_vector.assert_called_once_with(
+        patched_rag.vector.assert_called_once_with(
             mock_config.CHROMA_PATH,
             mock_config.EMBEDDING_MODEL,
             mock_config.MAX_RESULTS,
         )
-        mock_ai.assert_called_once_with(
+        patched_rag.ai.assert_called_once_with(
             mock_config.ANTHROPIC_API_KEY, mock_config.ANTHROPIC_MODEL
         )
-        mock_session.assert_called_once_with(mock_config.MAX_HISTORY)
+        patched_rag.session.assert_called_once_with(mock_config.MAX_HISTORY)
 
         # Verify tools were registered
         assert len(rag.tool_manager.tools) == 2
         assert "search_course_content" in rag.tool_manager.tools
         assert "get_course_outline" in rag.tool_manager.tools
 
-    @patch("rag_system.VectorStore")
-    @patch("rag_system.AIGenerator")
-    @patch("rag_system.DocumentProcessor")
-    @patch("rag_system.SessionManager")
-    def test_query_content_question(
-        self,
-        mock_session_class,
-        mock_processor_class,
-        mock_ai_class,
-        mock_vector_class,
-        mock_config,
-    ):
+    def test_query_content_question(self, patched_rag, rag):
         """Test querying with a content-related question"""
-        # Setup mocks
-        mock_vector = MagicMock()
-        mock_vector_class.return_value = mock_vector
-
-        mock_ai = MagicMock()
-        mock_ai_class.return_value = mock_ai
-
-        mock_session = MagicMock()
-        mock_session_class.return_value = mock_session
-
-        mock_processor = MagicMock()
-        mock_processor_class.return_value = mock_processor
+        mock_vector = patched_rag.vector.return_value
+        mock_ai = patched_rag.ai.return_value
+        mock_session = patched_rag.session.return_value
 
         # Setup search results
-        mock_vector.search.return_value = SearchResults(
-            documents=[
-                "Prompt caching retains processing results between invocations."
-            ],
-            metadata=[
-                {"course_title": "Building Towards Computer Use", "lesson_number": 5}
-            ],
-            distances=[0.1],
-            error=None,
-        )
+        mock_vector.search.return_value = _PROMPT_CACHING_RESULTS
 
         mock_vector.get_lesson_link.return_value = "https://example.com/lesson5"
 
@@ -89,8 +141,7 @@ class TestRAGSystemIntegration:
             "Prompt caching is a technique that retains processing results."
         )
 
-        # Create RAG system and query
-        rag = RAGSystem(mock_config)
+        # Query the RAG system
         response, sources = rag.query(
             "What is prompt caching?", session_id="test-session"
         )
@@ -112,31 +163,10 @@ class TestRAGSystemIntegration:
             "test-session", "What is prompt caching?", response
         )
 
-    @patch("rag_system.VectorStore")
-    @patch("rag_system.AIGenerator")
-    @patch("rag_system.DocumentProcessor")
-    @patch("rag_system.SessionManager")
-    def test_query_outline_question(
-        self,
-        mock_session_class,
-        mock_processor_class,
-        mock_ai_class,
-        mock_vector_class,
-        mock_config,
-    ):
+    def test_query_outline_question(self, patched_rag, rag):
         """Test querying for course outline"""
-        # Setup mocks
-        mock_vector = MagicMock()
-        mock_vector_class.return_value = mock_vector
-
-        mock_ai = MagicMock()
-        mock_ai_class.return_value = mock_ai
-
-        mock_session = MagicMock()
-        mock_session_class.return_value = mock_session
-
-        mock_processor = MagicMock()
-        mock_processor_class.return_value = mock_processor
+        mock_vector = patched_rag.vector.return_value
+        mock_ai = patched_rag.ai.return_value
 
         # Setup course info
         mock_vector.get_course_info.return_value = {
@@ -154,58 +184,26 @@ class TestRAGSystemIntegration:
             "Course outline: Introduction, Getting Started..."
         )
 
-        # Create RAG system and query
-        rag = RAGSystem(mock_config)
+        # Query the RAG system
         response, sources = rag.query("Show me the course outline")
 
         # Verify tools were provided to AI
         call_args = mock_ai.generate_response.call_args[1]
-        tool_defs = call_args["tools"]
+        tool_defs = rag.tool_manager.get_tool_definitions_by_name()
+        assert call_args["tools"] == list(tool_defs.values())
 
         # Check that get_course_outline tool is available
-        outline_tool = next(
-            (t for t in tool_defs if t["name"] == "get_course_outline"), None
-        )
-        assert outline_tool is not None
+        outline_tool = tool_defs["get_course_outline"]
         assert "course_name" in outline_tool["input_schema"]["properties"]
 
-    @patch("rag_system.VectorStore")
-    @patch("rag_system.AIGenerator")
-    @patch("rag_system.DocumentProcessor")
-    @patch("rag_system.SessionManager")
-    def test_query_with_tool_execution(
-        self,
-        mock_session_class,
-        mock_processor_class,
-        mock_ai_class,
-        mock_vector_class,
-        mock_config,
-    ):
+    def test_query_with_tool_execution(self, patched_rag, rag):
         """Test full tool execution flow"""
-        # Setup mocks
-        mock_vector = MagicMock()
-        mock_vector_class.return_value = mock_vector
-
-        mock_ai = MagicMock()
-        mock_ai_class.return_value = mock_ai
-
-        mock_session = MagicMock()
-        mock_session_class.return_value = mock_session
+        mock_vector = patched_rag.vector.return_value
+        mock_session = patched_rag.session.return_value
         mock_session.get_conversation_history.return_value = None
 
-        mock_processor = MagicMock()
-        mock_processor_class.return_value = mock_processor
-
-        # Create RAG system
-        rag = RAGSystem(mock_config)
-
         # Setup vector store to return search results when tool is executed
-        mock_vector.search.return_value = SearchResults(
-            documents=["Content about computer use."],
-            metadata=[{"course_title": "Test Course", "lesson_number": 1}],
-            distances=[0.1],
-            error=None,
-        )
+        mock_vector.search.return_value = _COMPUTER_USE_RESULTS
 
         # Execute search tool directly through tool manager
         result = rag.tool_manager.execute_tool(
@@ -221,35 +219,13 @@ class TestRAGSystemIntegration:
         assert len(sources) > 0
         assert sources[0]["text"] == "Test Course - Lesson 1"
 
-    @patch("rag_system.VectorStore")
-    @patch("rag_system.AIGenerator")
-    @patch("rag_system.DocumentProcessor")
-    @patch("rag_system.SessionManager")
-    def test_query_without_session(
-        self,
-        mock_session_class,
-        mock_processor_class,
-        mock_ai_class,
-        mock_vector_class,
-        mock_config,
-    ):
+    def test_query_without_session(self, patched_rag, rag):
         """Test query without session ID"""
-        # Setup mocks
-        mock_vector = MagicMock()
-        mock_vector_class.return_value = mock_vector
-
-        mock_ai = MagicMock()
-        mock_ai_class.return_value = mock_ai
+        mock_ai = patched_rag.ai.return_value
         mock_ai.generate_response.return_value = "Test response"
+        mock_session = patched_rag.session.return_value
 
-        mock_session = MagicMock()
-        mock_session_class.return_value = mock_session
-
-        mock_processor = MagicMock()
-        mock_processor_class.return_value = mock_processor
-
-        # Create RAG system and query without session
-        rag = RAGSystem(mock_config)
+        # Query without a session
         response, sources = rag.query("Test question")
 
         # Verify no session operations occurred
@@ -258,39 +234,12 @@ class TestRAGSystemIntegration:
 
         assert response == "Test response"
 
-    @patch("rag_system.VectorStore")
-    @patch("rag_system.AIGenerator")
-    @patch("rag_system.DocumentProcessor")
-    @patch("rag_system.SessionManager")
-    def test_query_with_error_in_search(
-        self,
-        mock_session_class,
-        mock_processor_class,
-        mock_ai_class,
-        mock_vector_class,
-        mock_config,
-    ):
+    def test_query_with_error_in_search(self, patched_rag, rag):
         """Test handling search errors"""
-        # Setup mocks
-        mock_vector = MagicMock()
-        mock_vector_class.return_value = mock_vector
-
-        mock_ai = MagicMock()
-        mock_ai_class.return_value = mock_ai
-
-        mock_session = MagicMock()
-        mock_session_class.return_value = mock_session
-
-        mock_processor = MagicMock()
-        mock_processor_class.return_value = mock_processor
+        mock_vector = patched_rag.vector.return_value
 
         # Setup search to return error
-        mock_vector.search.return_value = SearchResults(
-            documents=[], metadata=[], distances=[], error="Database connection failed"
-        )
-
-        # Create RAG system
-        rag = RAGSystem(mock_config)
+        mock_vector.search.return_value = _ERROR_RESULTS
 
         # Execute search tool directly
         result = rag.tool_manager.execute_tool(
@@ -302,183 +251,160 @@ class TestRAGSystemIntegration:
         assert rag.tool_manager.get_last_sources() == []
 
     @patch("rag_system.os.path.exists")
-    @patch("rag_system.VectorStore")
-    @patch("rag_system.AIGenerator")
-    @patch("rag_system.DocumentProcessor")
-    @patch("rag_system.SessionManager")
-    def test_add_course_document(
-        self,
-        mock_session_class,
-        mock_processor_class,
-        mock_ai_class,
-        mock_vector_class,
-        mock_exists,
-        mock_config,
-    ):
+    def test_add_course_document(self, mock_exists, patched_rag, rag):
         """Test adding a course document"""
-        # Setup mocks
-        mock_vector = MagicMock()
-        mock_vector_class.return_value = mock_vector
-
-        mock_ai = MagicMock()
-        mock_ai_class.return_value = mock_ai
-
-        mock_session = MagicMock()
-        mock_session_class.return_value = mock_session
-
-        mock_processor = MagicMock()
-        mock_processor_class.return_value = mock_processor
+        mock_vector = patched_rag.vector.return_value
+        mock_processor = patched_rag.processor.return_value
 
         # Setup document processing
-        mock_course = Course(
-            title="Test Course",
-            course_link="https://example.com",
-            instructor="Test Instructor",
-            lessons=[Lesson(lesson_number=0, title="Intro")],
-        )
-
-        mock_chunks = [
-            CourseChunk(
-                content="Test content",
-                course_title="Test Course",
-                lesson_number=0,
-                chunk_index=0,
-            )
-        ]
-
-        mock_processor.process_course_document.return_value = (mock_course, mock_chunks)
+        mock_processor.process_course_document.return_value = (_COURSE, _CHUNKS)
 
-        # Create RAG system and add document
-        rag = RAGSystem(mock_config)
+        # Add the document
         course, num_chunks = rag.add_course_document("test.txt")
 
         # Verify processing
         mock_processor.process_course_document.assert_called_once_with("test.txt")
-        mock_vector.add_course_metadata.assert_called_once_with(mock_course)
-        mock_vector.add_course_content.assert_called_once_with(mock_chunks)
+        mock_vector.add_course_metadata.assert_called_once_with(_COURSE)
+        mock_vector.add_course_content.assert_called_once_with(_CHUNKS)
 
-        assert course == mock_course
+        assert course == _COURSE
         assert num_chunks == 1
 
-    @patch("rag_system.os.listdir")
-    @patch("rag_system.os.path.isfile")
-    @patch("rag_system.os.path.exists")
-    @patch("rag_system.VectorStore")
-    @patch("rag_system.AIGenerator")
-    @patch("rag_system.DocumentProcessor")
-    @patch("rag_system.SessionManager")
-    def test_add_course_folder(
-        self,
-        mock_session_class,
-        mock_processor_class,
-        mock_ai_class,
-        mock_vector_class,
-        mock_exists,
-        mock_isfile,
-        mock_listdir,
-        mock_config,
-    ):
+    def test_add_course_folder(self, patched_rag, rag, tmp_path):
         """Test adding multiple course documents from folder"""
-        # Setup mocks
-        mock_vector = MagicMock()
-        mock_vector_class.return_value = mock_vector
+        mock_vector = patched_rag.vector.return_value
         mock_vector.get_existing_course_titles.return_value = []
+        mock_processor = patched_rag.processor.return_value
 
-        mock_ai = MagicMock()
-        mock_ai_class.return_value = mock_ai
+        # Setup folder contents; only the course documents should be parsed
+        for file_name in ["course1.txt", "course2.txt", "image.jpg"]:
+            (tmp_path / file_name).touch()
+        (tmp_path / "notes.txt").mkdir()
 
-        mock_session = MagicMock()
-        mock_session_class.return_value = mock_session
-
-        mock_processor = MagicMock()
-        mock_processor_class.return_value = mock_processor
-
-        # Setup file system mocks
-        mock_exists.return_value = True
-        mock_listdir.return_value = ["course1.txt", "course2.txt", "image.jpg"]
-        mock_isfile.side_effect = lambda x: True
-
-        # Setup document processing
-        mock_course1 = Course(title="Course 1", lessons=[])
-        mock_course2 = Course(title="Course 2", lessons=[])
-        mock_chunks1 = [
-            CourseChunk(content="C1", course_title="Course 1", chunk_index=0)
-        ]
-        mock_chunks2 = [
-            CourseChunk(content="C2", course_title="Course 2", chunk_index=0)
-        ]
-
-        mock_processor.process_course_document.side_effect = [
-            (mock_course1, mock_chunks1),
-            (mock_course2, mock_chunks2),
-        ]
+        # Files may be parsed in any order, so key results by file name
+        mock_processor.process_course_document.side_effect = (
+            lambda path: _FOLDER_DOCUMENTS[os.path.basename(path)]
+        )
 
-        # Create RAG system and add folder
-        rag = RAGSystem(mock_config)
-        num_courses, num_chunks = rag.add_course_folder("test_folder")
+        # Add the folder
+        num_courses, num_chunks = rag.add_course_folder(str(tmp_path))
 
         # Verify processing
         assert mock_processor.process_course_document.call_count == 2
         assert mock_vector.add_course_metadata.call_count == 2
         assert mock_vector.add_course_content.call_count == 2
+        added = {
+            c.args[0].title for c in mock_vector.add_course_metadata.call_args_list
+        }
+        assert added == {"Course 1", "Course 2"}
 
         assert num_courses == 2
         assert num_chunks == 2
 
-    @patch("rag_system.VectorStore")
-    @patch("rag_system.AIGenerator")
-    @patch("rag_system.DocumentProcessor")
-    @patch("rag_system.SessionManager")
-    def test_source_tracking(
-        self,
-        mock_session_class,
-        mock_processor_class,
-        mock_ai_class,
-        mock_vector_class,
-        mock_config,
+    def test_add_course_folder_parallel(self, patched_rag, rag, tmp_path):
+        """Test parsing a folder in spawned worker processes"""
+        mock_vector = patched_rag.vector.return_value
+        mock_vector.get_existing_course_titles.return_value = []
+        rag.document_processor = DocumentProcessor(chunk_size=800, chunk_overlap=100)
+
+        file_count = 3
+        for i in range(file_count):
+            (tmp_path / f"course{i}.txt").write_text(
+                f"Course Title: Course {i}\n"
+                "Course Link: https://example.com\n"
+                "Course Instructor: Test Instructor\n"
+                "\n"
+                "Lesson 0: Introduction\n"
+                f"Welcome to course {i}.\n"
+            )
+
+        num_courses, num_chunks = rag.add_course_folder(str(tmp_path), parallel=True)
+
+        added = {
+            c.args[0].title for c in mock_vector.add_course_metadata.call_args_list
+        }
+        assert added == {f"Course {i}" for i in range(file_count)}
+        assert num_courses == file_count
+        assert num_chunks == file_count
+
+    def test_add_course_folder_broken_pool(
+        self, patched_rag, rag, monkeypatch, tmp_path
     ):
-        """Test that sources are properly tracked and reset"""
-        # Setup mocks
-        mock_vector = MagicMock()
-        mock_vector_class.return_value = mock_vector
+        """Test falling back to serial parsing when worker processes die"""
 
-        mock_ai = MagicMock()
-        mock_ai_class.return_value = mock_ai
-        mock_ai.generate_response.return_value = "Test response"
+        class _BrokenPool:
+            def __init__(self, max_workers, mp_context):
+                pass
 
-        mock_session = MagicMock()
-        mock_session_class.return_value = mock_session
+            def __enter__(self):
+                return self
 
-        mock_processor = MagicMock()
-        mock_processor_class.return_value = mock_processor
+            def __exit__(self, *exc_info):
+                return False
 
-        # Setup search results
-        mock_vector.search.return_value = SearchResults(
-            documents=["Doc 1"],
-            metadata=[{"course_title": "Course 1", "lesson_number": 1}],
-            distances=[0.1],
-            error=None,
+            def submit(self, fn, *args):
+                raise BrokenProcessPool("worker failed to start")
+
+        monkeypatch.setattr("rag_system.ProcessPoolExecutor", _BrokenPool)
+        mock_vector = patched_rag.vector.return_value
+        mock_vector.get_existing_course_titles.return_value = []
+        mock_processor = patched_rag.processor.return_value
+        mock_processor.process_course_document.side_effect = (
+            lambda path: _FOLDER_DOCUMENTS[os.path.basename(path)]
         )
+        for file_name in _FOLDER_DOCUMENTS:
+            (tmp_path / file_name).touch()
 
-        mock_vector.get_lesson_link.return_value = "https://example.com/lesson1"
+        num_courses, num_chunks = rag.add_course_folder(str(tmp_path), parallel=True)
 
-        # Create RAG system
-        rag = RAGSystem(mock_config)
+        assert mock_processor.process_course_document.call_count == 2
+        assert (num_courses, num_chunks) == (2, 2)
 
-        # Execute tool to generate sources
-        rag.tool_manager.execute_tool("search_course_content", query="test")
+    def test_sources_captured_on_execute(self, patched_rag, rag):
+        """Test that executing a search tool records its sources"""
+        mock_vector = patched_rag.vector.return_value
+        mock_vector.search.return_value = _SOURCE_RESULTS
+        mock_vector.get_lesson_link.return_value = "https://example.com/lesson1"
 
-        # Get sources before query
-        sources = rag.tool_manager.get_last_sources()
-        assert len(sources) == 1
+        rag.tool_manager.execute_tool("search_course_content", query="test")
 
-        # Execute query (should reset sources after retrieval)
-        response, query_sources = rag.query("Test question")
+        assert rag.tool_manager.get_last_sources() == [
+            {"text": "Course 1 - Lesson 1", "link": "https://example.com/lesson1"}
+        ]
 
-        # Verify sources were retrieved and then reset
+    def test_sources_reset_after_query(self, patched_rag, rag):
+        """Test that query returns the tracked sources and then resets them"""
+        patched_rag.ai.return_value.generate_response.return_value = "Test response"
+        sources = [{"text": "Course 1 - Lesson 1", "link": None}]
+
+        with (
+            patch.object(
+                rag.tool_manager, "get_last_sources", return_value=sources
+            ) as mock_get_sources,
+            patch.object(rag.tool_manager, "reset_sources") as mock_reset_sources,
+        ):
+            response, query_sources = rag.query("Test question")
+
+        mock_get_sources.assert_called_once_with()
+        mock_reset_sources.assert_called_once_with()
         assert query_sources == sources
-        assert rag.tool_manager.get_last_sources() == []
 
+    async def test_aquery_isolates_sources(self, patched_rag, rag):
+        """Test async queries track sources on their own tool manager"""
+        mock_vector = patched_rag.vector.return_value
+        mock_vector.search.return_value = _SOURCE_RESULTS
+        mock_vector.get_lesson_link.return_value = "https://example.com/lesson1"
 
-if __name__ == "__main__":
-    pytest.main([__file__, "-v"])
+        async def respond(query, conversation_history, tools, tool_manager):
+            tool_manager.execute_tool("search_course_content", query="test")
+            return "Async response"
+
+        mock_ai = patched_rag.ai.return_value
+        mock_ai.generate_response_async.side_effect = respond
+
+        response, sources = await rag.aquery("Test question")
+
+        assert response == "Async response"
+        assert [source["text"] for source in sources] == ["Course 1 - Lesson 1"]
+        # The shared tool manager used by query() is untouched
+        assert rag.tool_manager.get_last_sources() == []
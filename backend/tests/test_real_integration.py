@@ -3,17 +3,13 @@ Real integration tests to diagnose 'query failed' issue.
 These tests interact with actual ChromaDB and check real data.
 """
 
+import asyncio
+import logging
 import os
 import shutil
-import sys
-import tempfile
 from pathlib import Path
 
 import pytest
-
-# Add backend directory to path
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
-
 from config import Config
 from document_processor import DocumentProcessor
 from models import Course, CourseChunk, Lesson
@@ -21,35 +17,67 @@ from rag_system import RAGSystem
 from search_tools import CourseOutlineTool, CourseSearchTool, ToolManager
 from vector_store import VectorStore
 
+logger = logging.getLogger(__name__)
+
+
+@pytest.fixture(scope="session")
+def real_config():
+    """The application's actual configuration"""
+    return Config()
+
+
+@pytest.fixture(scope="module")
+def real_vector_store(real_config):
+    """Vector store backed by the actual ChromaDB, shared across the module"""
+    return VectorStore(
+        real_config.CHROMA_PATH,
+        real_config.EMBEDDING_MODEL,
+        real_config.MAX_RESULTS,
+    )
+
+
+@pytest.fixture
+def debug_vector_store(real_vector_store):
+    """Throwaway collections next to the real ones, dropped after the test"""
+    store = real_vector_store.with_suffix("test_debug")
+    yield store
+    store.client.delete_collection(store.course_catalog.name)
+    store.client.delete_collection(store.course_content.name)
 
+
+@pytest.fixture(scope="module")
+def real_rag(real_config):
+    """Full RAG system on the actual database, shared across the module"""
+    if not real_config.ANTHROPIC_API_KEY:
+        pytest.skip("ANTHROPIC_API_KEY not set")
+    return RAGSystem(real_config)
+
+
+@pytest.mark.integration
+# Every test here shares CHROMA_PATH, so keep them on one xdist worker
+@pytest.mark.xdist_group("chromadb")
 class TestRealIntegration:
     """Test with real ChromaDB to diagnose issues"""
 
-    def test_check_existing_database(self):
+    def test_check_existing_database(self, real_vector_store):
         """Check if the existing ChromaDB has any data"""
-        # Use the actual config
-        config = Config()
-
-        # Create vector store with actual ChromaDB
-        vector_store = VectorStore(
-            config.CHROMA_PATH, config.EMBEDDING_MODEL, config.MAX_RESULTS
-        )
+        vector_store = real_vector_store
 
         # Check course count
         course_count = vector_store.get_course_count()
-        print(f"\nNumber of courses in database: {course_count}")
+        logger.debug("Number of courses in database: %s", course_count)
 
         # Get existing course titles
         course_titles = vector_store.get_existing_course_titles()
-        print(f"Course titles: {course_titles}")
+        logger.debug("Course titles: %s", course_titles)
 
         # Try a basic search
         results = vector_store.search("computer use")
-        print(f"\nSearch for 'computer use':")
-        print(f"  - Documents found: {len(results.documents)}")
-        print(f"  - Error: {results.error}")
+        logger.debug("Search for 'computer use':")
+        logger.debug("  - Documents found: %d", len(results.documents))
+        logger.debug("  - Error: %s", results.error)
         if results.documents:
-            print(f"  - First result: {results.documents[0][:100]}...")
+            logger.debug("  - First result: %s...", results.documents[0][:100])
 
         # Try search with course filter
         if course_titles:
@@ -57,68 +85,64 @@ class TestRealIntegration:
                 "prompt caching",
                 course_name=course_titles[0] if course_titles else None,
             )
-            print(
-                f"\nSearch for 'prompt caching' in course '{course_titles[0] if course_titles else 'None'}':"
+            logger.debug(
+                "Search for 'prompt caching' in course '%s':", course_titles[0]
             )
-            print(f"  - Documents found: {len(results.documents)}")
-            print(f"  - Error: {results.error}")
+            logger.debug("  - Documents found: %d", len(results.documents))
+            logger.debug("  - Error: %s", results.error)
 
-    def test_document_processing(self):
+    def test_document_processing(self, real_config):
         """Test if documents are being processed correctly"""
-        config = Config()
+        config = real_config
         processor = DocumentProcessor(config.CHUNK_SIZE, config.CHUNK_OVERLAP)
 
         # Check if docs folder exists
         docs_path = "../docs"
         if os.path.exists(docs_path):
-            files = [f for f in os.listdir(docs_path) if f.endswith(".txt")]
-            print(f"\nFound {len(files)} .txt files in docs folder")
+            with os.scandir(docs_path) as entries:
+                files = [
+                    entry.path
+                    for entry in entries
+                    if entry.is_file() and entry.name.endswith(".txt")
+                ]
+            logger.debug("Found %d .txt files in docs folder", len(files))
 
             if files:
                 # Process first file
-                file_path = os.path.join(docs_path, files[0])
-                print(f"Processing: {files[0]}")
+                file_path = files[0]
+                logger.debug("Processing: %s", os.path.basename(file_path))
 
                 try:
                     course, chunks = processor.process_course_document(file_path)
-                    print(f"  - Course title: {course.title}")
-                    print(f"  - Number of lessons: {len(course.lessons)}")
-                    print(f"  - Number of chunks: {len(chunks)}")
+                    logger.debug("  - Course title: %s", course.title)
+                    logger.debug("  - Number of lessons: %d", len(course.lessons))
+                    logger.debug("  - Number of chunks: %d", len(chunks))
 
                     if chunks:
-                        print(f"  - First chunk preview: {chunks[0].content[:100]}...")
+                        logger.debug(
+                            "  - First chunk preview: %s...", chunks[0].content[:100]
+                        )
                 except Exception as e:
-                    print(f"  - Error processing: {e}")
+                    logger.error("  - Error processing: %s", e)
         else:
-            print(f"\nDocs folder not found at {docs_path}")
+            logger.debug("Docs folder not found at %s", docs_path)
 
-    def test_tool_execution_with_real_data(self):
+    def test_tool_execution_with_real_data(self, real_vector_store):
         """Test tool execution with actual database"""
-        config = Config()
-        vector_store = VectorStore(
-            config.CHROMA_PATH, config.EMBEDDING_MODEL, config.MAX_RESULTS
-        )
-
-        # Create and test search tool
-        search_tool = CourseSearchTool(vector_store)
+        vector_store = real_vector_store
 
-        print("\nTesting CourseSearchTool.execute:")
+        logger.debug("Testing VectorStore.search_batch:")
 
-        # Test 1: Basic search
-        result = search_tool.execute(query="computer use")
-        print(f"\n1. Search for 'computer use':")
-        print(f"   Result length: {len(result)}")
-        print(f"   Sources found: {len(search_tool.last_sources)}")
-        if result and len(result) > 100:
-            print(f"   Preview: {result[:200]}...")
-        else:
-            print(f"   Full result: {result}")
-
-        # Test 2: Search with specific content
-        result = search_tool.execute(query="prompt caching")
-        print(f"\n2. Search for 'prompt caching':")
-        print(f"   Result length: {len(result)}")
-        print(f"   Sources found: {len(search_tool.last_sources)}")
+        # Tests 1 and 2: basic and content searches, embedded and run together
+        queries = ["computer use", "prompt caching"]
+        batch_results = vector_store.search_batch(queries)
+        batches = zip(queries, batch_results, strict=True)
+        for number, (query, results) in enumerate(batches, 1):
+            logger.debug("%s. Search for '%s':", number, query)
+            logger.debug("   Documents found: %d", len(results.documents))
+            logger.debug("   Error: %s", results.error)
+            if results.documents:
+                logger.debug("   Preview: %s...", results.documents[0][:200])
 
         # Test 3: Course outline tool
         outline_tool = CourseOutlineTool(vector_store)
@@ -127,69 +151,49 @@ class TestRealIntegration:
         course_titles = vector_store.get_existing_course_titles()
         if course_titles:
             result = outline_tool.execute(course_name=course_titles[0])
-            print(f"\n3. Get outline for '{course_titles[0]}':")
-            print(f"   Result length: {len(result)}")
+            logger.debug("3. Get outline for '%s':", course_titles[0])
+            logger.debug("   Result length: %d", len(result))
             if result and "No course found" not in result:
-                print(f"   Preview: {result[:300]}...")
-
-    def test_rag_system_query(self):
-        """Test the full RAG system query"""
-        config = Config()
-
-        # Check if API key is set
-        if not config.ANTHROPIC_API_KEY:
-            print("\n[WARNING] ANTHROPIC_API_KEY not set - skipping RAG query test")
-            return
-
-        try:
-            # Create RAG system
-            rag = RAGSystem(config)
-
-            # Get course count
-            analytics = rag.get_course_analytics()
-            print(f"\nRAG System Analytics:")
-            print(f"  - Total courses: {analytics['total_courses']}")
-            print(f"  - Course titles: {analytics['course_titles']}")
-
-            # Try to query
-            print("\nTesting RAG queries:")
-
-            # Test queries
-            test_queries = [
-                "What is computer use?",
-                "Tell me about prompt caching",
-                "What lessons are in the course?",
-                "Show me the course outline",
-            ]
-
-            for query in test_queries:
-                print(f"\nQuery: '{query}'")
-                try:
-                    response, sources = rag.query(query)
-                    print(f"  Response length: {len(response)}")
-                    print(f"  Sources: {len(sources)}")
-                    if response and len(response) > 100:
-                        print(f"  Response preview: {response[:150]}...")
-                    else:
-                        print(f"  Full response: {response}")
-                except Exception as e:
-                    print(f"  ERROR: {e}")
+                logger.debug("   Preview: %s...", result[:300])
+
+    def test_rag_system_analytics(self, real_rag):
+        """Report what the full RAG system sees in the database"""
+        analytics = real_rag.get_course_analytics()
+        logger.debug("RAG System Analytics:")
+        logger.debug("  - Total courses: %s", analytics["total_courses"])
+        logger.debug("  - Course titles: %s", analytics["course_titles"])
+
+    async def test_rag_system_query(self, real_rag):
+        """Test the full RAG system query, issuing the queries concurrently"""
+        queries = [
+            "What is computer use?",
+            "Tell me about prompt caching",
+            "What lessons are in the course?",
+            "Show me the course outline",
+        ]
+        results = await asyncio.gather(
+            *(real_rag.aquery(query) for query in queries), return_exceptions=True
+        )
 
-        except Exception as e:
-            print(f"\nError initializing RAG system: {e}")
+        for query, result in zip(queries, results, strict=True):
+            logger.debug("Query: '%s'", query)
+            if isinstance(result, Exception):
+                logger.error("  Query failed: %s", result)
+                continue
+            response, sources = result
+            logger.debug("  Response length: %d", len(response))
+            logger.debug("  Sources: %d", len(sources))
+            if response and len(response) > 100:
+                logger.debug("  Response preview: %s...", response[:150])
+            else:
+                logger.debug("  Full response: %s", response)
 
-    def test_create_test_database(self):
+    def test_create_test_database(self, tmp_path, debug_vector_store, real_config):
         """Create a small test database to verify functionality"""
-        # Create temporary directory for test
-        with tempfile.TemporaryDirectory() as temp_dir:
-            test_config = Config()
-            test_config.CHROMA_PATH = os.path.join(temp_dir, "test_chroma")
-
-            # Create test document
-            test_doc_path = os.path.join(temp_dir, "test_course.txt")
-            with open(test_doc_path, "w") as f:
-                f.write(
-                    """Course Title: Test Course for Debugging
+        # Create test document
+        test_doc_path = tmp_path / "test_course.txt"
+        test_doc_path.write_text(
+            """Course Title: Test Course for Debugging
 Course Link: https://example.com/test
 Course Instructor: Test Instructor
 
@@ -201,56 +205,34 @@ Lesson 1: Advanced Testing
 This lesson covers advanced testing topics including integration testing.
 We discuss how to debug when queries return 'query failed'.
 """
-                )
+        )
 
-            # Create vector store and processor
-            vector_store = VectorStore(
-                test_config.CHROMA_PATH,
-                test_config.EMBEDDING_MODEL,
-                test_config.MAX_RESULTS,
-            )
+        vector_store = debug_vector_store
+        processor = DocumentProcessor(real_config.CHUNK_SIZE, real_config.CHUNK_OVERLAP)
 
-            processor = DocumentProcessor(
-                test_config.CHUNK_SIZE, test_config.CHUNK_OVERLAP
-            )
+        # Process and add document
+        course, chunks = processor.process_course_document(str(test_doc_path))
+        vector_store.add_course_metadata(course)
+        vector_store.add_course_content(chunks)
 
-            # Process and add document
-            course, chunks = processor.process_course_document(test_doc_path)
-            vector_store.add_course_metadata(course)
-            vector_store.add_course_content(chunks)
-
-            print("\nTest database created:")
-            print(f"  - Course: {course.title}")
-            print(f"  - Lessons: {len(course.lessons)}")
-            print(f"  - Chunks: {len(chunks)}")
-
-            # Test search
-            search_tool = CourseSearchTool(vector_store)
-            result = search_tool.execute(query="prompt caching")
-            print(f"\nSearch test in temporary database:")
-            print(f"  - Result found: {len(result) > 0}")
-            print(f"  - Sources: {len(search_tool.last_sources)}")
-
-            if not result or "No relevant content found" in result:
-                print("  - ERROR: Search failed even with test data!")
-            else:
-                print("  - SUCCESS: Search working with test data")
+        logger.debug("Test database created:")
+        logger.debug("  - Course: %s", course.title)
+        logger.debug("  - Lessons: %d", len(course.lessons))
+        logger.debug("  - Chunks: %d", len(chunks))
+
+        # Test search
+        search_tool = CourseSearchTool(vector_store)
+        result = search_tool.execute(query="prompt caching")
+        logger.debug("Search test in test collections:")
+        logger.debug("  - Result found: %s", len(result) > 0)
+        logger.debug("  - Sources: %d", len(search_tool.last_sources))
+
+        if not result or "No relevant content found" in result:
+            logger.error("  - Search failed even with test data!")
+        else:
+            logger.debug("  - SUCCESS: Search working with test data")
 
 
 if __name__ == "__main__":
-    # Run specific diagnostic tests
-    test = TestRealIntegration()
-
-    print("=" * 60)
-    print("DIAGNOSTIC TESTS FOR 'QUERY FAILED' ISSUE")
-    print("=" * 60)
-
-    test.test_check_existing_database()
-    test.test_document_processing()
-    test.test_tool_execution_with_real_data()
-    test.test_create_test_database()
-    test.test_rag_system_query()
-
-    print("\n" + "=" * 60)
-    print("DIAGNOSTIC COMPLETE")
-    print("=" * 60)
+    # Run the diagnostic tests in-process so their log output stays visible
+    pytest.main([__file__, "--run-integration", "--log-cli-level=DEBUG"])
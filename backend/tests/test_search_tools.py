@@ -1,15 +1,29 @@
-import os
-import sys
-from unittest.mock import MagicMock, patch
+from types import SimpleNamespace
+from unittest.mock import patch
 
 import pytest
-
-# Add backend directory to path
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
-
 from search_tools import CourseOutlineTool, CourseSearchTool, ToolManager
 from vector_store import SearchResults
 
+# Canned search payloads; the tools only read them, so they are shared
+_EMPTY_RESULTS = SearchResults(documents=[], metadata=[], distances=[], error=None)
+_ERROR_RESULTS = SearchResults.empty("Search error: Connection failed")
+_NO_LESSON_RESULTS = SearchResults(
+    documents=["Content without lesson"],
+    metadata=[{"course_title": "Test Course"}],
+    distances=[0.1],
+    error=None,
+)
+
+
+@pytest.fixture(scope="module")
+def populated_manager(_mock_vector_store_base):
+    """ToolManager with both course tools registered, shared across the module"""
+    manager = ToolManager()
+    manager.register_tool(CourseSearchTool(_mock_vector_store_base))
+    manager.register_tool(CourseOutlineTool(_mock_vector_store_base))
+    return manager
+
 
 class TestCourseSearchTool:
     """Test suite for CourseSearchTool"""
@@ -28,64 +42,36 @@ class TestCourseSearchTool:
         assert "lesson_number" in definition["input_schema"]["properties"]
         assert definition["input_schema"]["required"] == ["query"]
 
-    def test_execute_basic_query(self, mock_vector_store):
-        """Test basic query execution without filters"""
-        tool = CourseSearchTool(mock_vector_store)
-
-        result = tool.execute(query="What is computer use?")
-
-        # Verify vector store was called correctly
-        mock_vector_store.search.assert_called_once_with(
-            query="What is computer use?", course_name=None, lesson_number=None
-        )
-
-        # Check result formatting
-        assert "Building Towards Computer Use with Anthropic" in result
-        assert "Welcome to Building Toward Computer Use" in result
-        assert len(tool.last_sources) == 2
-
-    def test_execute_with_course_filter(self, mock_vector_store):
-        """Test query execution with course name filter"""
+    @pytest.mark.parametrize(
+        "query,course_name,lesson_number",
+        [
+            ("What is computer use?", None, None),
+            ("What is prompt caching?", "Building Towards Computer Use", None),
+            ("What topics are covered?", "Building Towards Computer Use", 1),
+        ],
+        ids=["basic", "course_filter", "lesson_filter"],
+    )
+    def test_execute(self, mock_vector_store, query, course_name, lesson_number):
+        """Test query execution with and without filters"""
         tool = CourseSearchTool(mock_vector_store)
 
         result = tool.execute(
-            query="What is prompt caching?", course_name="Building Towards Computer Use"
+            query=query, course_name=course_name, lesson_number=lesson_number
         )
 
-        # Verify vector store was called with course filter
-        mock_vector_store.search.assert_called_once_with(
-            query="What is prompt caching?",
-            course_name="Building Towards Computer Use",
-            lesson_number=None,
-        )
+        # Verify the filters were passed through to the vector store
+        assert mock_vector_store.search_calls == [
+            {"query": query, "course_name": course_name, "lesson_number": lesson_number}
+        ]
 
+        # Check result formatting
         assert "[Building Towards Computer Use with Anthropic" in result
-
-    def test_execute_with_lesson_filter(self, mock_vector_store):
-        """Test query execution with lesson number filter"""
-        tool = CourseSearchTool(mock_vector_store)
-
-        result = tool.execute(
-            query="What topics are covered?",
-            course_name="Building Towards Computer Use",
-            lesson_number=1,
-        )
-
-        # Verify vector store was called with both filters
-        mock_vector_store.search.assert_called_once_with(
-            query="What topics are covered?",
-            course_name="Building Towards Computer Use",
-            lesson_number=1,
-        )
+        assert "Welcome to Building Toward Computer Use" in result
+        assert len(tool.last_sources) == 2
 
     def test_execute_with_error(self, mock_vector_store):
         """Test execution when vector store returns an error"""
-        mock_vector_store.search.return_value = SearchResults(
-            documents=[],
-            metadata=[],
-            distances=[],
-            error="Search error: Connection failed",
-        )
+        mock_vector_store.search_results = _ERROR_RESULTS
 
         tool = CourseSearchTool(mock_vector_store)
         result = tool.execute(query="test query")
@@ -93,42 +79,41 @@ class TestCourseSearchTool:
         assert result == "Search error: Connection failed"
         assert tool.last_sources == []
 
-    def test_execute_with_empty_results(self, mock_vector_store):
+    @pytest.mark.parametrize(
+        "kwargs,expected",
+        [
+            ({}, "No relevant content found."),
+            (
+                {"course_name": "Test Course"},
+                "No relevant content found in course 'Test Course'.",
+            ),
+            ({"lesson_number": 5}, "No relevant content found in lesson 5."),
+            (
+                {"course_name": "Test Course", "lesson_number": 5},
+                "No relevant content found in course 'Test Course' in lesson 5.",
+            ),
+        ],
+        ids=["no_filter", "course_filter", "lesson_filter", "both_filters"],
+    )
+    def test_execute_with_empty_results(self, mock_vector_store, kwargs, expected):
         """Test execution when no results are found"""
-        mock_vector_store.search.return_value = SearchResults(
-            documents=[], metadata=[], distances=[], error=None
-        )
+        mock_vector_store.search_results = _EMPTY_RESULTS
 
         tool = CourseSearchTool(mock_vector_store)
 
-        # Test without filters
-        result = tool.execute(query="nonexistent content")
-        assert result == "No relevant content found."
-
-        # Test with course filter
-        result = tool.execute(query="test", course_name="Test Course")
-        assert result == "No relevant content found in course 'Test Course'."
-
-        # Test with lesson filter
-        result = tool.execute(query="test", lesson_number=5)
-        assert result == "No relevant content found in lesson 5."
-
-        # Test with both filters
-        result = tool.execute(query="test", course_name="Test Course", lesson_number=5)
-        assert (
-            result == "No relevant content found in course 'Test Course' in lesson 5."
-        )
+        assert tool.execute(query="test", **kwargs) == expected
 
     def test_format_results_with_links(self, mock_vector_store):
         """Test result formatting with lesson links"""
-        mock_vector_store.get_lesson_link.side_effect = [
-            "https://example.com/lesson0",
-            "https://example.com/lesson1",
-        ]
-
         tool = CourseSearchTool(mock_vector_store)
         result = tool.execute(query="test")
 
+        # Links are looked up per result by course title and lesson number
+        assert mock_vector_store.lesson_link_calls == [
+            ("Building Towards Computer Use with Anthropic", 0),
+            ("Building Towards Computer Use with Anthropic", 1),
+        ]
+
         # Check that sources have links
         assert len(tool.last_sources) == 2
         assert (
@@ -144,12 +129,7 @@ class TestCourseSearchTool:
 
     def test_format_results_without_lesson_numbers(self, mock_vector_store):
         """Test formatting when metadata doesn't include lesson numbers"""
-        mock_vector_store.search.return_value = SearchResults(
-            documents=["Content without lesson"],
-            metadata=[{"course_title": "Test Course"}],
-            distances=[0.1],
-            error=None,
-        )
+        mock_vector_store.search_results = _NO_LESSON_RESULTS
 
         tool = CourseSearchTool(mock_vector_store)
         result = tool.execute(query="test")
@@ -160,28 +140,33 @@ class TestCourseSearchTool:
         assert tool.last_sources[0]["link"] is None
 
 
+@pytest.fixture
+def outline_tool(mock_vector_store, request):
+    """CourseOutlineTool on the fake store, serving the parametrized course info"""
+    # Unparametrized tests keep the fake store's default course
+    if hasattr(request, "param"):
+        mock_vector_store.course_info = request.param
+    return CourseOutlineTool(mock_vector_store)
+
+
 class TestCourseOutlineTool:
     """Test suite for CourseOutlineTool"""
 
-    def test_get_tool_definition(self, mock_vector_store):
+    def test_get_tool_definition(self, outline_tool):
         """Test that tool definition is correctly structured"""
-        tool = CourseOutlineTool(mock_vector_store)
-        definition = tool.get_tool_definition()
+        definition = outline_tool.get_tool_definition()
 
         assert definition["name"] == "get_course_outline"
         assert "description" in definition
         assert "input_schema" in definition
         assert definition["input_schema"]["required"] == ["course_name"]
 
-    def test_execute_with_valid_course(self, mock_vector_store):
+    def test_execute_with_valid_course(self, mock_vector_store, outline_tool):
         """Test getting outline for existing course"""
-        tool = CourseOutlineTool(mock_vector_store)
-        result = tool.execute(course_name="Building Towards Computer Use")
+        result = outline_tool.execute(course_name="Building Towards Computer Use")
 
         # Verify course info was requested
-        mock_vector_store.get_course_info.assert_called_once_with(
-            "Building Towards Computer Use"
-        )
+        assert mock_vector_store.course_info_calls == ["Building Towards Computer Use"]
 
         # Check formatted output
         assert "Course Title: Building Towards Computer Use with Anthropic" in result
@@ -191,71 +176,76 @@ class TestCourseOutlineTool:
         assert "Lesson 1: Getting Started" in result
 
         # Check sources
-        assert len(tool.last_sources) == 1
+        assert len(outline_tool.last_sources) == 1
         assert (
-            tool.last_sources[0]["text"]
+            outline_tool.last_sources[0]["text"]
             == "Building Towards Computer Use with Anthropic - Course Outline"
         )
 
-    def test_execute_with_nonexistent_course(self, mock_vector_store):
-        """Test getting outline for non-existent course"""
-        mock_vector_store.get_course_info.return_value = None
-
-        tool = CourseOutlineTool(mock_vector_store)
-        result = tool.execute(course_name="Nonexistent Course")
-
-        assert result == "No course found matching 'Nonexistent Course'"
-        assert tool.last_sources == []
-
-    def test_execute_without_instructor(self, mock_vector_store):
-        """Test outline formatting when instructor is missing"""
-        mock_vector_store.get_course_info.return_value = {
-            "title": "Test Course",
-            "link": None,
-            "instructor": None,
-            "lessons": [],
-        }
-
-        tool = CourseOutlineTool(mock_vector_store)
-        result = tool.execute(course_name="Test Course")
-
-        assert "Course Title: Test Course" in result
-        assert "Course Instructor" not in result
-        assert "Course Link" not in result
+    @pytest.mark.parametrize(
+        "outline_tool,course_name,expected,contains,absent,sources",
+        [
+            (
+                None,
+                "Nonexistent Course",
+                "No course found matching 'Nonexistent Course'",
+                [],
+                [],
+                [],
+            ),
+            (
+                {
+                    "title": "Test Course",
+                    "link": None,
+                    "instructor": None,
+                    "lessons": [],
+                },
+                "Test Course",
+                None,
+                ["Course Title: Test Course"],
+                ["Course Instructor", "Course Link", "Lessons:"],
+                [{"text": "Test Course - Course Outline", "link": None}],
+            ),
+        ],
+        indirect=["outline_tool"],
+        ids=["nonexistent_course", "without_instructor"],
+    )
+    def test_execute_variants(
+        self, outline_tool, course_name, expected, contains, absent, sources
+    ):
+        """Test outline output when the course is missing or sparse"""
+        result = outline_tool.execute(course_name=course_name)
+
+        if expected is not None:
+            assert result == expected
+        for text in contains:
+            assert text in result
+        for text in absent:
+            assert text not in result
+        assert outline_tool.last_sources == sources
 
 
 class TestToolManager:
     """Test suite for ToolManager"""
 
-    def test_register_tool(self, mock_vector_store):
-        """Test registering tools with the manager"""
-        manager = ToolManager()
-        tool = CourseSearchTool(mock_vector_store)
-
-        manager.register_tool(tool)
-
-        assert "search_course_content" in manager.tools
-        assert manager.tools["search_course_content"] == tool
-
     def test_register_tool_without_name(self, mock_vector_store):
         """Test that registering a tool without name raises error"""
         manager = ToolManager()
 
-        # Create a mock tool with invalid definition
-        mock_tool = MagicMock()
-        mock_tool.get_tool_definition.return_value = {"description": "test"}
+        # Create a stand-in tool with invalid definition
+        mock_tool = SimpleNamespace(get_tool_definition=lambda: {"description": "test"})
 
-        with pytest.raises(ValueError, match="Tool must have a 'name'"):
+        with pytest.raises(ValueError) as exc_info:
             manager.register_tool(mock_tool)
+        assert str(exc_info.value) == "Tool must have a 'name' in its definition"
 
-    def test_get_tool_definitions(self, mock_vector_store):
-        """Test getting all tool definitions"""
-        manager = ToolManager()
-        search_tool = CourseSearchTool(mock_vector_store)
-        outline_tool = CourseOutlineTool(mock_vector_store)
+    def test_register_and_get_tool_definitions(self, populated_manager):
+        """Test registered tools are stored and exposed by name"""
+        manager = populated_manager
 
-        manager.register_tool(search_tool)
-        manager.register_tool(outline_tool)
+        assert list(manager.tools) == ["search_course_content", "get_course_outline"]
+        assert isinstance(manager.tools["search_course_content"], CourseSearchTool)
+        assert isinstance(manager.tools["get_course_outline"], CourseOutlineTool)
 
         definitions = manager.get_tool_definitions()
 
@@ -263,6 +253,10 @@ class TestToolManager:
         assert any(d["name"] == "search_course_content" for d in definitions)
         assert any(d["name"] == "get_course_outline" for d in definitions)
 
+        by_name = manager.get_tool_definitions_by_name()
+        assert list(by_name) == ["search_course_content", "get_course_outline"]
+        assert list(by_name.values()) == definitions
+
     def test_execute_tool(self, mock_vector_store):
         """Test executing a tool through the manager"""
         manager = ToolManager()
@@ -272,7 +266,7 @@ class TestToolManager:
         result = manager.execute_tool("search_course_content", query="test query")
 
         assert "Building Towards Computer Use" in result
-        mock_vector_store.search.assert_called_once()
+        assert len(mock_vector_store.search_calls) == 1
 
     def test_execute_nonexistent_tool(self):
         """Test executing a tool that doesn't exist"""
@@ -285,8 +279,8 @@ class TestToolManager:
     def test_get_last_sources(self, mock_vector_store):
         """Test retrieving sources from last tool execution"""
         manager = ToolManager()
-        tool = CourseSearchTool(mock_vector_store)
-        manager.register_tool(tool)
+        manager.register_tool(CourseSearchTool(mock_vector_store))
+        manager.register_tool(CourseOutlineTool(mock_vector_store))
 
         # Execute tool to generate sources
         manager.execute_tool("search_course_content", query="test")
@@ -316,7 +310,3 @@ class TestToolManager:
         assert manager.get_last_sources() == []
         assert search_tool.last_sources == []
         assert outline_tool.last_sources == []
-
-
-if __name__ == "__main__":
-    pytest.main([__file__, "-v"])
@@ -1,14 +1,10 @@
 import json
-import os
-import sys
-from unittest.mock import MagicMock, call, patch
+from dataclasses import dataclass
+from types import SimpleNamespace
+from typing import Optional
+from unittest.mock import Mock
 
 import pytest
-
-# Add backend directory to path
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
-
-from models import Course, CourseChunk, Lesson
 from vector_store import SearchResults, VectorStore
 
 
@@ -40,6 +36,12 @@ class TestSearchResults:
         assert results.error == "No results found"
         assert results.is_empty()
 
+    def test_slots(self):
+        """Test SearchResults instances carry no per-instance __dict__"""
+        results = SearchResults(documents=["doc"], metadata=[{}], distances=[0.1])
+
+        assert not hasattr(results, "__dict__")
+
     def test_is_empty(self):
         """Test is_empty method"""
         # Empty results
@@ -51,56 +53,154 @@ class TestSearchResults:
         assert not full_results.is_empty()
 
 
-class TestVectorStore:
-    """Test VectorStore class"""
+# The collection methods VectorStore calls
+_COLLECTION_METHODS = ["query", "add", "get"]
 
-    @patch("vector_store.chromadb.PersistentClient")
-    @patch(
-        "vector_store.chromadb.utils.embedding_functions.SentenceTransformerEmbeddingFunction"
-    )
-    def test_initialization(self, mock_embedding_func, mock_chroma_client):
-        """Test VectorStore initialization"""
-        mock_client = MagicMock()
-        mock_chroma_client.return_value = mock_client
 
-        mock_collection = MagicMock()
-        mock_client.get_or_create_collection.return_value = mock_collection
+class _StubClient:
+    """Stand-in for chromadb.PersistentClient that serves canned collections"""
 
-        store = VectorStore("./test_db", "test-model", max_results=10)
+    def __init__(self, path, settings=None):
+        self.path = path
+        self.catalog = Mock(spec=_COLLECTION_METHODS)
+        self.content = Mock(spec=_COLLECTION_METHODS)
+        self.created = []
+        self.deleted = []
 
-        # Verify ChromaDB client was created
-        mock_chroma_client.assert_called_once()
+    def get_or_create_collection(self, name, embedding_function):
+        self.created.append((name, embedding_function))
+        # Suffixed collections share the unsuffixed mocks
+        return self.catalog if name.startswith("course_catalog") else self.content
 
-        # Verify collections were created
-        assert mock_client.get_or_create_collection.call_count == 2
-        mock_client.get_or_create_collection.assert_any_call(
-            name="course_catalog", embedding_function=mock_embedding_func.return_value
-        )
-        mock_client.get_or_create_collection.assert_any_call(
-            name="course_content", embedding_function=mock_embedding_func.return_value
-        )
+    def delete_collection(self, name):
+        self.deleted.append(name)
 
-        assert store.max_results == 10
 
-    @patch("vector_store.chromadb.PersistentClient")
-    @patch(
-        "vector_store.chromadb.utils.embedding_functions.SentenceTransformerEmbeddingFunction"
+class _StubEmbeddingFunction:
+    """Stand-in for SentenceTransformerEmbeddingFunction that records its inputs"""
+
+    def __init__(self, model_name):
+        self.model_name = model_name
+        self.calls = []
+
+    def __call__(self, input):
+        self.calls.append(list(input))
+        return _embed(input)
+
+
+def _embed(texts):
+    """The one-dimensional embeddings _StubEmbeddingFunction returns for texts"""
+    return [[float(len(text))] for text in texts]
+
+
+@pytest.fixture(scope="module", autouse=True)
+def _stub_chromadb():
+    """Install the ChromaDB stubs for every test in the module"""
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr("vector_store.chromadb.PersistentClient", _StubClient)
+        mp.setattr(
+            "vector_store.chromadb.utils.embedding_functions.SentenceTransformerEmbeddingFunction",
+            _StubEmbeddingFunction,
+        )
+        yield
+
+
+@pytest.fixture(scope="module")
+def _store_template(_stub_chromadb):
+    """Build one VectorStore on the ChromaDB stubs for the whole module"""
+    store = VectorStore("./test_db", "test-model")
+    return SimpleNamespace(
+        store=store,
+        client=store.client,
+        catalog=store.client.catalog,
+        content=store.client.content,
     )
-    def test_search_basic(self, mock_embedding_func, mock_chroma_client):
-        """Test basic search without filters"""
-        mock_client = MagicMock()
-        mock_chroma_client.return_value = mock_client
 
-        mock_content_collection = MagicMock()
-        mock_catalog_collection = MagicMock()
 
-        mock_client.get_or_create_collection.side_effect = [
-            mock_catalog_collection,
-            mock_content_collection,
+@pytest.fixture
+def vector_store_ctx(_store_template):
+    """The shared store and its stubs, with per-test state cleared"""
+    ctx = _store_template
+    ctx.catalog.reset_mock(return_value=True, side_effect=True)
+    ctx.content.reset_mock(return_value=True, side_effect=True)
+    ctx.client.created.clear()
+    ctx.client.deleted.clear()
+    ctx.store.embedding_function.calls.clear()
+    return ctx
+
+
+# Catalog lesson metadata, serialized once the way add_course_metadata stores it
+_LESSONS = [
+    {
+        "lesson_number": 0,
+        "lesson_title": "Intro",
+        "lesson_link": "https://example.com/lesson0",
+    },
+    {"lesson_number": 1, "lesson_title": "Advanced", "lesson_link": None},
+]
+_LESSONS_JSON = json.dumps(_LESSONS)
+
+# Catalog responses for get_course_info: name resolution, then metadata lookup
+_COURSE_INFO_CATALOG = {
+    "query.return_value": {
+        "documents": [["Building Towards Computer Use"]],
+        "metadatas": [[{"title": "Building Towards Computer Use"}]],
+    },
+    "get.return_value": {
+        "metadatas": [
+            {
+                "title": "Building Towards Computer Use",
+                "course_link": "https://example.com/course",
+                "instructor": "Colt Steele",
+                "lessons_json": _LESSONS_JSON,
+            }
         ]
-
-        # Setup mock search results
-        mock_content_collection.query.return_value = {
+    },
+}
+
+# Expected course_content.query kwargs, built once for the cases below
+_QUERY_BASIC = {"query_texts": ["test query"], "n_results": 5, "where": None}
+_QUERY_COURSE = {
+    "query_texts": ["test query"],
+    "n_results": 5,
+    "where": {"course_title": "Building Towards Computer Use"},
+}
+_QUERY_LESSON = {
+    "query_texts": ["test query"],
+    "n_results": 5,
+    "where": {"lesson_number": 3},
+}
+_QUERY_BOTH = {
+    "query_texts": ["query"],
+    "n_results": 5,
+    "where": {"$and": [{"course_title": "Test Course"}, {"lesson_number": 2}]},
+}
+_QUERY_PLAIN = {"query_texts": ["query"], "n_results": 5, "where": None}
+_QUERY_BATCH = {
+    "query_embeddings": _embed(["query a", "query b"]),
+    "n_results": 5,
+    "where": None,
+}
+
+
+@dataclass(frozen=True)
+class SearchCase:
+    """A single VectorStore.search call and its expected outcome"""
+
+    kwargs: dict
+    catalog_result: Optional[dict] = None
+    content_result: Optional[dict] = None
+    content_error: Optional[Exception] = None
+    # None when the content collection must not be queried
+    expected_query: Optional[dict] = None
+    documents: tuple = ()
+    error: Optional[str] = None
+
+
+SEARCH_CASES = [
+    SearchCase(
+        kwargs={"query": "test query"},
+        content_result={
             "documents": [["Result 1", "Result 2"]],
             "metadatas": [
                 [
@@ -109,381 +209,288 @@ class TestVectorStore:
                 ]
             ],
             "distances": [[0.1, 0.2]],
-        }
-
-        store = VectorStore("./test_db", "test-model")
-        results = store.search("test query")
-
-        # Verify search was called correctly
-        mock_content_collection.query.assert_called_once_with(
-            query_texts=["test query"], n_results=5, where=None
-        )
-
-        assert len(results.documents) == 2
-        assert results.documents[0] == "Result 1"
-
-    @patch("vector_store.chromadb.PersistentClient")
-    @patch(
-        "vector_store.chromadb.utils.embedding_functions.SentenceTransformerEmbeddingFunction"
-    )
-    def test_search_with_course_filter(self, mock_embedding_func, mock_chroma_client):
-        """Test search with course name filter"""
-        mock_client = MagicMock()
-        mock_chroma_client.return_value = mock_client
-
-        mock_content_collection = MagicMock()
-        mock_catalog_collection = MagicMock()
-
-        mock_client.get_or_create_collection.side_effect = [
-            mock_catalog_collection,
-            mock_content_collection,
-        ]
-
-        # Setup course resolution
-        mock_catalog_collection.query.return_value = {
+        },
+        expected_query=_QUERY_BASIC,
+        documents=("Result 1", "Result 2"),
+    ),
+    SearchCase(
+        kwargs={"query": "test query", "course_name": "Computer Use"},
+        catalog_result={
             "documents": [["Building Towards Computer Use"]],
             "metadatas": [[{"title": "Building Towards Computer Use"}]],
-        }
-
-        # Setup content search
-        mock_content_collection.query.return_value = {
+        },
+        content_result={
             "documents": [["Filtered result"]],
             "metadatas": [[{"course_title": "Building Towards Computer Use"}]],
             "distances": [[0.1]],
-        }
-
-        store = VectorStore("./test_db", "test-model")
-        results = store.search("test query", course_name="Computer Use")
-
-        # Verify course was resolved
-        mock_catalog_collection.query.assert_called_once_with(
-            query_texts=["Computer Use"], n_results=1
-        )
-
-        # Verify content search with filter
-        mock_content_collection.query.assert_called_once_with(
-            query_texts=["test query"],
-            n_results=5,
-            where={"course_title": "Building Towards Computer Use"},
-        )
-
-        assert len(results.documents) == 1
-
-    @patch("vector_store.chromadb.PersistentClient")
-    @patch(
-        "vector_store.chromadb.utils.embedding_functions.SentenceTransformerEmbeddingFunction"
-    )
-    def test_search_with_lesson_filter(self, mock_embedding_func, mock_chroma_client):
-        """Test search with lesson number filter"""
-        mock_client = MagicMock()
-        mock_chroma_client.return_value = mock_client
-
-        mock_content_collection = MagicMock()
-        mock_catalog_collection = MagicMock()
-
-        mock_client.get_or_create_collection.side_effect = [
-            mock_catalog_collection,
-            mock_content_collection,
-        ]
-
-        mock_content_collection.query.return_value = {
+        },
+        expected_query=_QUERY_COURSE,
+        documents=("Filtered result",),
+    ),
+    SearchCase(
+        kwargs={"query": "test query", "lesson_number": 3},
+        content_result={
             "documents": [["Lesson 3 content"]],
             "metadatas": [[{"lesson_number": 3}]],
             "distances": [[0.1]],
-        }
-
-        store = VectorStore("./test_db", "test-model")
-        results = store.search("test query", lesson_number=3)
-
-        # Verify search with lesson filter
-        mock_content_collection.query.assert_called_once_with(
-            query_texts=["test query"], n_results=5, where={"lesson_number": 3}
-        )
-
-    @patch("vector_store.chromadb.PersistentClient")
-    @patch(
-        "vector_store.chromadb.utils.embedding_functions.SentenceTransformerEmbeddingFunction"
-    )
-    def test_search_with_both_filters(self, mock_embedding_func, mock_chroma_client):
-        """Test search with both course and lesson filters"""
-        mock_client = MagicMock()
-        mock_chroma_client.return_value = mock_client
-
-        mock_content_collection = MagicMock()
-        mock_catalog_collection = MagicMock()
-
-        mock_client.get_or_create_collection.side_effect = [
-            mock_catalog_collection,
-            mock_content_collection,
-        ]
-
-        # Setup course resolution
-        mock_catalog_collection.query.return_value = {
+        },
+        expected_query=_QUERY_LESSON,
+        documents=("Lesson 3 content",),
+    ),
+    SearchCase(
+        kwargs={"query": "query", "course_name": "Test", "lesson_number": 2},
+        catalog_result={
             "documents": [["Test Course"]],
             "metadatas": [[{"title": "Test Course"}]],
-        }
+        },
+        content_result={"documents": [[]], "metadatas": [[]], "distances": [[]]},
+        expected_query=_QUERY_BOTH,
+    ),
+    SearchCase(
+        kwargs={"query": "query", "course_name": "Nonexistent Course"},
+        catalog_result={"documents": [[]], "metadatas": [[]], "distances": [[]]},
+        error="No course found matching 'Nonexistent Course'",
+    ),
+    SearchCase(
+        kwargs={"query": "query"},
+        content_error=Exception("Database error"),
+        expected_query=_QUERY_PLAIN,
+        error="Search error: Database error",
+    ),
+]
 
-        mock_content_collection.query.return_value = {
-            "documents": [[]],
-            "metadatas": [[]],
-            "distances": [[]],
-        }
 
-        store = VectorStore("./test_db", "test-model")
-        results = store.search("query", course_name="Test", lesson_number=2)
+class TestVectorStore:
+    """Test VectorStore class"""
 
-        # Verify combined filter
-        mock_content_collection.query.assert_called_once_with(
-            query_texts=["query"],
-            n_results=5,
-            where={"$and": [{"course_title": "Test Course"}, {"lesson_number": 2}]},
-        )
+    def test_initialization(self, vector_store_ctx):
+        """Test VectorStore initialization"""
+        ctx = vector_store_ctx
 
-    @patch("vector_store.chromadb.PersistentClient")
-    @patch(
-        "vector_store.chromadb.utils.embedding_functions.SentenceTransformerEmbeddingFunction"
-    )
-    def test_search_course_not_found(self, mock_embedding_func, mock_chroma_client):
-        """Test search when course name doesn't match"""
-        mock_client = MagicMock()
-        mock_chroma_client.return_value = mock_client
+        store = VectorStore("./test_db", "test-model", max_results=10)
 
-        mock_content_collection = MagicMock()
-        mock_catalog_collection = MagicMock()
+        # Verify ChromaDB client and embedding function were created
+        assert isinstance(store.client, _StubClient)
+        assert store.client.path == "./test_db"
+        assert store.embedding_function.model_name == "test-model"
 
-        mock_client.get_or_create_collection.side_effect = [
-            mock_catalog_collection,
-            mock_content_collection,
+        # Verify collections were created
+        assert store.client.created == [
+            ("course_catalog", store.embedding_function),
+            ("course_content", store.embedding_function),
         ]
 
-        # No course found
-        mock_catalog_collection.query.return_value = {
-            "documents": [[]],
-            "metadatas": [[]],
-            "distances": [[]],
-        }
-
-        store = VectorStore("./test_db", "test-model")
-        results = store.search("query", course_name="Nonexistent Course")
-
-        assert results.error == "No course found matching 'Nonexistent Course'"
-        assert results.is_empty()
+        # The shared store's client saw none of this
+        assert ctx.client.created == []
+        assert store.max_results == 10
 
-    @patch("vector_store.chromadb.PersistentClient")
-    @patch(
-        "vector_store.chromadb.utils.embedding_functions.SentenceTransformerEmbeddingFunction"
+    @pytest.mark.parametrize(
+        "case",
+        SEARCH_CASES,
+        ids=[
+            "basic",
+            "course_filter",
+            "lesson_filter",
+            "both_filters",
+            "course_not_found",
+            "query_exception",
+        ],
     )
-    def test_search_with_exception(self, mock_embedding_func, mock_chroma_client):
-        """Test search error handling"""
-        mock_client = MagicMock()
-        mock_chroma_client.return_value = mock_client
+    def test_search(self, vector_store_ctx, case):
+        """Test search filter building, course resolution and error handling"""
+        ctx = vector_store_ctx
+        ctx.catalog.configure_mock(**{"query.return_value": case.catalog_result})
+        ctx.content.configure_mock(
+            **{
+                "query.return_value": case.content_result,
+                "query.side_effect": case.content_error,
+            }
+        )
 
-        mock_content_collection = MagicMock()
-        mock_catalog_collection = MagicMock()
+        results = ctx.store.search(**case.kwargs)
 
-        mock_client.get_or_create_collection.side_effect = [
-            mock_catalog_collection,
-            mock_content_collection,
-        ]
+        # Verify the course name was resolved through the catalog
+        if "course_name" in case.kwargs:
+            ctx.catalog.query.assert_called_once_with(
+                query_texts=[case.kwargs["course_name"]], n_results=1
+            )
 
-        # Simulate query error
-        mock_content_collection.query.side_effect = Exception("Database error")
+        # Verify content was searched with the expected filter
+        if case.expected_query:
+            ctx.content.query.assert_called_once_with(**case.expected_query)
+        else:
+            ctx.content.query.assert_not_called()
 
-        store = VectorStore("./test_db", "test-model")
-        results = store.search("query")
+        assert results.documents == list(case.documents)
+        assert results.error == case.error
 
-        assert "Search error: Database error" in results.error
-        assert results.is_empty()
+    def test_search_batch(self, vector_store_ctx):
+        """Test batched search embeds all queries and queries ChromaDB once"""
+        ctx = vector_store_ctx
 
-    @patch("vector_store.chromadb.PersistentClient")
-    @patch(
-        "vector_store.chromadb.utils.embedding_functions.SentenceTransformerEmbeddingFunction"
+        # One result list per query
+        ctx.content.query.return_value = {
+            "documents": [["Result A"], ["Result B1", "Result B2"]],
+            "metadatas": [
+                [{"course_title": "Course 1", "lesson_number": 1}],
+                [
+                    {"course_title": "Course 2", "lesson_number": 1},
+                    {"course_title": "Course 2", "lesson_number": 2},
+                ],
+            ],
+            "distances": [[0.1], [0.2, 0.3]],
+        }
+
+        results = ctx.store.search_batch(["query a", "query b"])
+
+        # Verify the queries were embedded and searched together
+        assert ctx.store.embedding_function.calls == [["query a", "query b"]]
+        ctx.content.query.assert_called_once_with(**_QUERY_BATCH)
+
+        assert len(results) == 2
+        assert results[0].documents == ["Result A"]
+        assert results[1].documents == ["Result B1", "Result B2"]
+        assert results[1].distances == [0.2, 0.3]
+
+    @pytest.mark.parametrize(
+        "kwargs,catalog_result,content_error,error",
+        [
+            (
+                {"course_name": "Nonexistent Course"},
+                {"documents": [[]], "metadatas": [[]], "distances": [[]]},
+                None,
+                "No course found matching 'Nonexistent Course'",
+            ),
+            (
+                {},
+                None,
+                Exception("Database error"),
+                "Search error: Database error",
+            ),
+        ],
+        ids=["course_not_found", "query_exception"],
     )
-    def test_add_course_metadata(self, mock_embedding_func, mock_chroma_client):
+    def test_search_batch_errors(
+        self, vector_store_ctx, kwargs, catalog_result, content_error, error
+    ):
+        """Test batched search returns one error result per query"""
+        ctx = vector_store_ctx
+        ctx.catalog.configure_mock(**{"query.return_value": catalog_result})
+        ctx.content.configure_mock(**{"query.side_effect": content_error})
+
+        results = ctx.store.search_batch(["query a", "query b"], **kwargs)
+
+        # Only a resolved course name reaches the content collection
+        if catalog_result is None:
+            ctx.content.query.assert_called_once_with(**_QUERY_BATCH)
+        else:
+            ctx.content.query.assert_not_called()
+
+        assert [r.error for r in results] == [error, error]
+        assert all(r.is_empty() for r in results)
+
+    def test_add_course_metadata(self, vector_store_ctx, sample_course):
         """Test adding course metadata"""
-        mock_client = MagicMock()
-        mock_chroma_client.return_value = mock_client
-
-        mock_catalog_collection = MagicMock()
-        mock_content_collection = MagicMock()
-
-        mock_client.get_or_create_collection.side_effect = [
-            mock_catalog_collection,
-            mock_content_collection,
-        ]
-
-        store = VectorStore("./test_db", "test-model")
-
-        course = Course(
-            title="Test Course",
-            course_link="https://example.com",
-            instructor="Test Instructor",
-            lessons=[
-                Lesson(
-                    lesson_number=0,
-                    title="Intro",
-                    lesson_link="https://example.com/lesson0",
-                ),
-                Lesson(lesson_number=1, title="Advanced", lesson_link=None),
-            ],
-        )
+        ctx = vector_store_ctx
 
-        store.add_course_metadata(course)
+        ctx.store.add_course_metadata(sample_course)
 
         # Verify add was called with correct data
-        mock_catalog_collection.add.assert_called_once()
-        call_args = mock_catalog_collection.add.call_args[1]
+        ctx.catalog.add.assert_called_once()
+        call_args = ctx.catalog.add.call_args[1]
 
-        assert call_args["documents"] == ["Test Course"]
-        assert call_args["ids"] == ["Test Course"]
+        assert call_args["documents"] == [sample_course.title]
+        assert call_args["ids"] == [sample_course.title]
 
         metadata = call_args["metadatas"][0]
-        assert metadata["title"] == "Test Course"
-        assert metadata["instructor"] == "Test Instructor"
-        assert metadata["course_link"] == "https://example.com"
-        assert metadata["lesson_count"] == 2
+        assert metadata["title"] == sample_course.title
+        assert metadata["instructor"] == "Colt Steele"
+        assert metadata["course_link"] == sample_course.course_link
+        assert metadata["lesson_count"] == 3
 
         # Check lessons JSON
-        lessons_data = json.loads(metadata["lessons_json"])
-        assert len(lessons_data) == 2
-        assert lessons_data[0]["lesson_number"] == 0
-        assert lessons_data[0]["lesson_title"] == "Intro"
-
-    @patch("vector_store.chromadb.PersistentClient")
-    @patch(
-        "vector_store.chromadb.utils.embedding_functions.SentenceTransformerEmbeddingFunction"
-    )
-    def test_add_course_content(self, mock_embedding_func, mock_chroma_client):
-        """Test adding course content chunks"""
-        mock_client = MagicMock()
-        mock_chroma_client.return_value = mock_client
-
-        mock_catalog_collection = MagicMock()
-        mock_content_collection = MagicMock()
-
-        mock_client.get_or_create_collection.side_effect = [
-            mock_catalog_collection,
-            mock_content_collection,
+        assert json.loads(metadata["lessons_json"]) == [
+            {
+                "lesson_number": lesson.lesson_number,
+                "lesson_title": lesson.title,
+                "lesson_link": lesson.lesson_link,
+            }
+            for lesson in sample_course.lessons
         ]
 
-        store = VectorStore("./test_db", "test-model")
-
-        chunks = [
-            CourseChunk(
-                content="Chunk 1 content",
-                course_title="Test Course",
-                lesson_number=0,
-                chunk_index=0,
-            ),
-            CourseChunk(
-                content="Chunk 2 content",
-                course_title="Test Course",
-                lesson_number=1,
-                chunk_index=1,
-            ),
-        ]
+    def test_add_course_content(self, vector_store_ctx, sample_course_chunks):
+        """Test adding course content chunks"""
+        ctx = vector_store_ctx
+        contents = [chunk.content for chunk in sample_course_chunks]
 
-        store.add_course_content(chunks)
+        ctx.store.add_course_content(sample_course_chunks)
 
         # Verify add was called correctly
-        mock_content_collection.add.assert_called_once()
-        call_args = mock_content_collection.add.call_args[1]
-
-        assert call_args["documents"] == ["Chunk 1 content", "Chunk 2 content"]
-        assert call_args["ids"] == ["Test_Course_0", "Test_Course_1"]
+        ctx.content.add.assert_called_once()
+        call_args = ctx.content.add.call_args[1]
+
+        assert call_args["documents"] == contents
+        assert call_args["ids"] == [
+            "Building_Towards_Computer_Use_with_Anthropic_0",
+            "Building_Towards_Computer_Use_with_Anthropic_1",
+            "Building_Towards_Computer_Use_with_Anthropic_2",
+        ]
 
         metadatas = call_args["metadatas"]
-        assert metadatas[0]["course_title"] == "Test Course"
+        assert metadatas[0]["course_title"] == sample_course_chunks[0].course_title
         assert metadatas[0]["lesson_number"] == 0
         assert metadatas[1]["chunk_index"] == 1
 
-    @patch("vector_store.chromadb.PersistentClient")
-    @patch(
-        "vector_store.chromadb.utils.embedding_functions.SentenceTransformerEmbeddingFunction"
-    )
-    def test_get_course_info(self, mock_embedding_func, mock_chroma_client):
+    def test_get_course_info(self, vector_store_ctx):
         """Test getting course information"""
-        mock_client = MagicMock()
-        mock_chroma_client.return_value = mock_client
+        ctx = vector_store_ctx
 
-        mock_catalog_collection = MagicMock()
-        mock_content_collection = MagicMock()
+        # Setup course resolution and metadata retrieval
+        ctx.catalog.configure_mock(**_COURSE_INFO_CATALOG)
 
-        mock_client.get_or_create_collection.side_effect = [
-            mock_catalog_collection,
-            mock_content_collection,
-        ]
-
-        # Setup course resolution
-        mock_catalog_collection.query.return_value = {
-            "documents": [["Building Towards Computer Use"]],
-            "metadatas": [[{"title": "Building Towards Computer Use"}]],
-        }
-
-        # Setup course metadata retrieval
-        lessons_json = json.dumps(
-            [
-                {
-                    "lesson_number": 0,
-                    "lesson_title": "Intro",
-                    "lesson_link": "https://example.com/l0",
-                },
-                {"lesson_number": 1, "lesson_title": "Advanced", "lesson_link": None},
-            ]
-        )
-
-        mock_catalog_collection.get.return_value = {
-            "metadatas": [
-                {
-                    "title": "Building Towards Computer Use",
-                    "course_link": "https://example.com/course",
-                    "instructor": "Colt Steele",
-                    "lessons_json": lessons_json,
-                }
-            ]
-        }
-
-        store = VectorStore("./test_db", "test-model")
-        course_info = store.get_course_info("Computer Use")
+        course_info = ctx.store.get_course_info("Computer Use")
 
         assert course_info["title"] == "Building Towards Computer Use"
         assert course_info["link"] == "https://example.com/course"
         assert course_info["instructor"] == "Colt Steele"
-        assert len(course_info["lessons"]) == 2
-        assert course_info["lessons"][0]["number"] == 0
-        assert course_info["lessons"][0]["title"] == "Intro"
+        assert course_info["lessons"] == [
+            {"number": 0, "title": "Intro", "link": "https://example.com/lesson0"},
+            {"number": 1, "title": "Advanced", "link": None},
+        ]
 
-    @patch("vector_store.chromadb.PersistentClient")
-    @patch(
-        "vector_store.chromadb.utils.embedding_functions.SentenceTransformerEmbeddingFunction"
-    )
-    def test_clear_all_data(self, mock_embedding_func, mock_chroma_client):
+    def test_clear_all_data(self, vector_store_ctx):
         """Test clearing all data from collections"""
-        mock_client = MagicMock()
-        mock_chroma_client.return_value = mock_client
-
-        mock_catalog_collection = MagicMock()
-        mock_content_collection = MagicMock()
-
-        # Initial creation
-        mock_client.get_or_create_collection.side_effect = [
-            mock_catalog_collection,
-            mock_content_collection,
-            # After clear
-            mock_catalog_collection,
-            mock_content_collection,
+        ctx = vector_store_ctx
+
+        ctx.store.clear_all_data()
+
+        # Verify collections were deleted and recreated
+        assert ctx.client.deleted == ["course_catalog", "course_content"]
+        assert ctx.client.created == [
+            ("course_catalog", ctx.store.embedding_function),
+            ("course_content", ctx.store.embedding_function),
         ]
+        assert ctx.store.course_catalog is ctx.catalog
+        assert ctx.store.course_content is ctx.content
+
+    def test_with_suffix(self, vector_store_ctx):
+        """Test suffixed stores reuse the client and namespace their collections"""
+        ctx = vector_store_ctx
+        store = ctx.store
 
-        store = VectorStore("./test_db", "test-model")
-        store.clear_all_data()
+        suffixed = store.with_suffix("debug")
 
-        # Verify collections were deleted
-        mock_client.delete_collection.assert_any_call("course_catalog")
-        mock_client.delete_collection.assert_any_call("course_content")
+        # Same client and embedding function, no second model load
+        assert suffixed.client is store.client
+        assert suffixed.embedding_function is store.embedding_function
 
-        # Verify collections were recreated
-        assert mock_client.get_or_create_collection.call_count == 4
+        assert ctx.client.created == [
+            ("course_catalog_debug", store.embedding_function),
+            ("course_content_debug", store.embedding_function),
+        ]
 
+        # The original store keeps its unsuffixed collections
+        assert store.collection_suffix == ""
 
-if __name__ == "__main__":
-    pytest.main([__file__, "-v"])
+        suffixed.clear_all_data()
+        assert ctx.client.deleted == ["course_catalog_debug", "course_content_debug"]
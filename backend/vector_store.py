@@ -1,13 +1,13 @@
+import copy
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 import chromadb
 from chromadb.config import Settings
 from models import Course, CourseChunk
-from sentence_transformers import SentenceTransformer
 
 
-@dataclass
+@dataclass(slots=True)
 class SearchResults:
     """Container for search results with metadata"""
 
@@ -17,17 +17,23 @@ class SearchResults:
     error: Optional[str] = None
 
     @classmethod
-    def from_chroma(cls, chroma_results: Dict) -> "SearchResults":
-        """Create SearchResults from ChromaDB query results"""
+    def from_chroma(cls, chroma_results: Dict, index: int = 0) -> "SearchResults":
+        """Create SearchResults from ChromaDB query results for one query"""
         return cls(
             documents=(
-                chroma_results["documents"][0] if chroma_results["documents"] else []
+                chroma_results["documents"][index]
+                if chroma_results["documents"]
+                else []
             ),
             metadata=(
-                chroma_results["metadatas"][0] if chroma_results["metadatas"] else []
+                chroma_results["metadatas"][index]
+                if chroma_results["metadatas"]
+                else []
             ),
             distances=(
-                chroma_results["distances"][0] if chroma_results["distances"] else []
+                chroma_results["distances"][index]
+                if chroma_results["distances"]
+                else []
             ),
         )
 
@@ -44,8 +50,16 @@ class SearchResults:
 class VectorStore:
     """Vector storage using ChromaDB for course content and metadata"""
 
-    def __init__(self, chroma_path: str, embedding_model: str, max_results: int = 5):
+    def __init__(
+        self,
+        chroma_path: str,
+        embedding_model: str,
+        max_results: int = 5,
+        collection_suffix: str = "",
+    ):
         self.max_results = max_results
+        # Namespaces the collections so several stores can share one database
+        self.collection_suffix = collection_suffix
         # Initialize ChromaDB client
         self.client = chromadb.PersistentClient(
             path=chroma_path, settings=Settings(anonymized_telemetry=False)
@@ -66,12 +80,33 @@ class VectorStore:
             "course_content"
         )  # Actual course material
 
+    def _collection_name(self, name: str) -> str:
+        """Apply the collection suffix, if any, to a base collection name"""
+        if self.collection_suffix:
+            return f"{name}_{self.collection_suffix}"
+        return name
+
     def _create_collection(self, name: str):
         """Create or get a ChromaDB collection"""
         return self.client.get_or_create_collection(
-            name=name, embedding_function=self.embedding_function
+            name=self._collection_name(name),
+            embedding_function=self.embedding_function,
         )
 
+    def with_suffix(self, collection_suffix: str) -> "VectorStore":
+        """
+        Get a store on the same client and embedding model whose collections
+        are namespaced by collection_suffix.
+
+        The embedding model and ChromaDB client are shared, so this is far
+        cheaper than constructing a second VectorStore.
+        """
+        store = copy.copy(self)
+        store.collection_suffix = collection_suffix
+        store.course_catalog = store._create_collection("course_catalog")
+        store.course_content = store._create_collection("course_content")
+        return store
+
     def search(
         self,
         query: str,
@@ -91,27 +126,89 @@ class VectorStore:
         Returns:
             SearchResults object with documents and metadata
         """
-        # Step 1: Resolve course name if provided
+        # Step 1: Resolve course name and build the filter and limit
+        query_args, error = self._content_query_args(course_name, lesson_number, limit)
+        if error:
+            return SearchResults.empty(error)
+
+        # Step 2: Search course content
+        try:
+            results = self.course_content.query(query_texts=[query], **query_args)
+            return SearchResults.from_chroma(results)
+        except Exception as e:
+            return SearchResults.empty(f"Search error: {str(e)}")
+
+    def search_batch(
+        self,
+        queries: List[str],
+        course_name: Optional[str] = None,
+        lesson_number: Optional[int] = None,
+        limit: Optional[int] = None,
+    ) -> List[SearchResults]:
+        """
+        Search course content for several queries with a single ChromaDB call.
+
+        The queries are embedded together and share the same filters.
+
+        Args:
+            queries: What to search for in course content
+            course_name: Optional course name/title to filter by
+            lesson_number: Optional lesson number to filter by
+            limit: Maximum results to return per query
+
+        Returns:
+            One SearchResults object per query, in the same order
+        """
+        if not queries:
+            return []
+
+        query_args, error = self._content_query_args(course_name, lesson_number, limit)
+        if error:
+            return [SearchResults.empty(error) for _ in queries]
+
+        try:
+            results = self.course_content.query(
+                query_embeddings=self.embedding_function(queries), **query_args
+            )
+            return [
+                SearchResults.from_chroma(results, index)
+                for index in range(len(queries))
+            ]
+        except Exception as e:
+            return [SearchResults.empty(f"Search error: {str(e)}") for _ in queries]
+
+    def _content_query_args(
+        self,
+        course_name: Optional[str],
+        lesson_number: Optional[int],
+        limit: Optional[int],
+    ) -> Tuple[Dict[str, Any], Optional[str]]:
+        """
+        Build the n_results and where arguments for a course content query.
+
+        Args:
+            course_name: Optional course name/title to filter by
+            lesson_number: Optional lesson number to filter by
+            limit: Maximum results to return per query
+
+        Returns:
+            Tuple of (query arguments, error message if the course name
+            doesn't match any course)
+        """
+        # Resolve course name if provided
         course_title = None
         if course_name:
             course_title = self._resolve_course_name(course_name)
             if not course_title:
-                return SearchResults.empty(f"No course found matching '{course_name}'")
+                return {}, f"No course found matching '{course_name}'"
 
-        # Step 2: Build filter for content search
+        # Build filter for content search
         filter_dict = self._build_filter(course_title, lesson_number)
 
-        # Step 3: Search course content
         # Use provided limit or fall back to configured max_results
         search_limit = limit if limit is not None else self.max_results
 
-        try:
-            results = self.course_content.query(
-                query_texts=[query], n_results=search_limit, where=filter_dict
-            )
-            return SearchResults.from_chroma(results)
-        except Exception as e:
-            return SearchResults.empty(f"Search error: {str(e)}")
+        return {"n_results": search_limit, "where": filter_dict}, None
 
     def _resolve_course_name(self, course_name: str) -> Optional[str]:
         """Use vector search to find best matching course by name"""
@@ -205,8 +302,8 @@ class VectorStore:
     def clear_all_data(self):
         """Clear all data from both collections"""
         try:
-            self.client.delete_collection("course_catalog")
-            self.client.delete_collection("course_content")
+            self.client.delete_collection(self._collection_name("course_catalog"))
+            self.client.delete_collection(self._collection_name("course_content"))
             # Recreate collections
             self.course_catalog = self._create_collection("course_catalog")
             self.course_content = self._create_collection("course_content")